@@ -6,7 +6,7 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from utils.data import load_countries, load_studies, load_tools, enrich_countries
+from utils.store import get_datasets
 from utils.ui import SIDEBAR_CSS
 
 st.set_page_config(
@@ -77,17 +77,8 @@ st.markdown(
 )
 
 
-@st.cache_data(ttl=3600)
-def get_data():
-    countries = load_countries()
-    studies = load_studies()
-    tools = load_tools()
-    enriched = enrich_countries(countries, studies)
-    return enriched, studies, tools
-
-
-countries, studies, tools = get_data()
-print(tools)
+data = get_datasets()
+countries, studies, tools = data.countries, data.studies, data.tools
 st.divider()
 
 # ── About ──────────────────────────────────────────────────────────────────────
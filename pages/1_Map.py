@@ -7,22 +7,23 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-from utils.data import load_countries, load_studies, enrich_countries, get_country_studies
-from utils.ui import SIDEBAR_CSS
+from utils.data import as_raw, get_country_studies
+from utils.maps import animated_choropleth, choropleth, geo_style
+from utils.payload import dataframe, payload_report, plotly_chart, start_payload_report
+from utils.store import get_datasets
+from utils.ui import SIDEBAR_CSS, export_controls
 
 st.set_page_config(page_title="Map | AISESA", layout="wide", page_icon="assets/aisesa_logo.png")
 st.html(SIDEBAR_CSS)
+start_payload_report()
 
 REGION_COLORS = {"north":"#1565C0","west":"#2E7D32","east":"#6A1B9A","central":"#E65100","southern":"#37474F"}
 POOL_COLORS   = {"COMELEC":"#0277BD","WAPP":"#2E7D32","EAPP":"#6A1B9A","CAPP":"#BF360C","SAPP":"#37474F"}
+# Flags left blank (or unreadable) in countries.csv are missing, shown as "Unknown"
+FLAG_LABELS   = {True:"Yes", False:"No"}
 
-@st.cache_data(ttl=3600)
-def get_data():
-    c = load_countries()
-    s = load_studies()
-    return enrich_countries(c, s), s
-
-countries_full, studies = get_data()
+data = get_datasets()
+countries_full, studies, country_index = data.countries, data.studies, data.country_index
 
 # ── Sidebar filters ────────────────────────────────────────────────────────────
 with st.sidebar:
@@ -64,103 +65,120 @@ with st.sidebar:
         unsafe_allow_html=True,
     )
 
-# ── Filter studies ─────────────────────────────────────────────────────────────
-filt = studies[
-    studies["year"].between(year_range[0], year_range[1], inclusive="both")
-]
-if scales:
-    filt = filt[filt["scale"].isin(scales)]
-if approaches:
-    filt = filt[filt["approach"].isin(approaches)]
-
-# Recompute country model counts based on filtered studies
-import re
-countries = countries_full.copy()
-def count_filtered(iso):
-    pat = r"\b" + re.escape(iso) + r"\b"
-    return filt["countries"].str.contains(pat, regex=True, na=False).sum()
-countries["nb_models_applied"] = countries["iso_code"].apply(count_filtered)
+# ── Filtered counts ────────────────────────────────────────────────────────────
+# Per-country, per-pool and total study counts for the current filters, read
+# straight off the precomputed year cube
+counts = data.map_cube.counts(year_range, scales, approaches)
+n_filtered = int(counts["all"].iloc[0])
+countries = countries_full.assign(
+    nb_models_applied=counts["country"].reindex(countries_full["iso_code"], fill_value=0).to_numpy()
+)
 
 st.title("Interactive Map")
 st.markdown(
-    f"Showing **{len(filt)}** studies ({year_range[0]}–{year_range[1]})"
+    f"Showing **{n_filtered}** studies ({year_range[0]}–{year_range[1]})"
     + (f" · scale: {', '.join(scales)}" if scales else "")
     + (f" · approach: {', '.join(approaches)}" if approaches else "")
 )
 
-mode = st.radio(
-    "Map layer",
-    ["Model Density", "National Only", "By Region", "By Power Pool", "Gap Score", "Readiness Score"],
-    horizontal=True,
-    label_visibility="collapsed",
+TOOL_COLORS = dict(zip(data.tools["tool_name"], px.colors.qualitative.Dark24 * 2))
+RECOMMENDATION_COLUMNS = ["recommended_tool", "recommendation_score", "runner_up"]
+
+# Tooltip columns on every country layer
+MAP_HOVER = (
+    "nb_models_applied", "electrification_rate", "data_availability", "has_institutional_capacity",
 )
 
-def make_choropleth(df, color_col, color_scale, label, color_discrete_map=None):
-    hover = {
-        "country_name": True, "iso3": False,
-        color_col: True, "nb_models_applied": True,
-        "electrification_rate": True, "data_availability": True,
-        "has_institutional_capacity": True,
-    }
-    if color_discrete_map:
-        fig = px.choropleth(
-            df, locations="iso3", color=color_col,
-            color_discrete_map=color_discrete_map,
-            hover_name="country_name", hover_data=hover, scope="africa",
-        )
-    else:
-        fig = px.choropleth(
-            df, locations="iso3", color=color_col,
-            color_continuous_scale=color_scale,
-            hover_name="country_name", hover_data=hover, scope="africa",
-            labels={color_col: label},
-        )
-    fig.update_geos(
-        showframe=False, showcoastlines=True, coastlinecolor="#ccc",
-        showland=True, landcolor="#F0F4F0", showocean=True, oceancolor="#E3EEF9",
-        showcountries=True, countrycolor="#ccc",
+def make_playback(year_range, scales, approaches, cumulative):
+    """
+    One animated choropleth with a frame per year, so playing through the
+    years happens in the browser without a rerun per step.
+    """
+    yearly = data.map_cube.yearly(year_range, scales, approaches, cumulative=cumulative)["country"]
+    frames = (
+        yearly.reindex(columns=countries_full["iso_code"], fill_value=0)
+        .set_axis(countries_full["iso3"], axis=1)
+        .stack().rename("Studies").reset_index()
+        .merge(countries_full[["iso3", "country_name"]], on="iso3")
+    )
+    fig = animated_choropleth(
+        frames, locations="iso3", color="Studies", animation_frame="year",
+        color_continuous_scale=["#C8E6C9","#1B5E20"],
+        # Fixed colour range so shades compare across frames
+        range_color=(0, max(int(frames["Studies"].max()), 1)),
+        hover_name="country_name", hover_data={"iso3": False, "year": False},
+        labels={"Studies": "Studies to date" if cumulative else "Studies that year"},
     )
-    fig.update_layout(margin={"r":0,"t":10,"l":0,"b":0}, height=500,
+    fig.update_geos(geo_style())
+    fig.update_layout(margin={"r":0,"t":10,"l":0,"b":0}, height=560,
                       paper_bgcolor="rgba(0,0,0,0)")
     return fig
 
-if mode == "Model Density":
-    fig = make_choropleth(countries, "nb_models_applied", ["#C8E6C9","#1B5E20"], "Studies applied")
-    
-elif mode == "National Only":
-    fig = make_choropleth(countries, "nb_models_national", ["#C8E6C9","#1B5E20"], "National studies")
 
-elif mode == "By Region":
-    fig = make_choropleth(countries, "region", None, "Region",
-                          color_discrete_map=REGION_COLORS)
-elif mode == "By Power Pool":
-    fig = make_choropleth(countries, "power_pool", None, "Power Pool",
-                          color_discrete_map=POOL_COLORS)
-elif mode == "Gap Score":
-    fig = make_choropleth(countries, "gap_score", ["#1B5E20","#FDD835","#B71C1C"], "Gap score (0-100)")
-else:
-    fig = make_choropleth(countries, "readiness_score", ["#B71C1C","#FDD835","#1B5E20"], "Readiness (0-10)")
+# ── Map layer ──────────────────────────────────────────────────────────────────
+# Switching layer reruns only this fragment: counts come in as arguments from
+# the last full run
+@st.fragment
+def layer_map(countries, year_range, scales, approaches):
+    mode = st.radio(
+        "Map layer",
+        ["Model Density", "National Only", "By Region", "By Power Pool", "Gap Score", "Readiness Score",
+         "Recommended Tool", "Year Playback"],
+        horizontal=True,
+        label_visibility="collapsed",
+    )
+
+    if mode == "Model Density":
+        fig = choropleth(countries, "nb_models_applied", "Studies applied",
+                         colorscale=["#C8E6C9","#1B5E20"], hover=MAP_HOVER)
+
+    elif mode == "National Only":
+        fig = choropleth(countries, "nb_models_national", "National studies",
+                         colorscale=["#C8E6C9","#1B5E20"], hover=MAP_HOVER)
 
-st.plotly_chart(fig, use_container_width=True)
+    elif mode == "By Region":
+        fig = choropleth(countries, "region", "Region", color_map=REGION_COLORS, hover=MAP_HOVER)
+    elif mode == "By Power Pool":
+        fig = choropleth(countries, "power_pool", "Power Pool", color_map=POOL_COLORS, hover=MAP_HOVER)
+    elif mode == "Gap Score":
+        fig = choropleth(countries, "gap_score", "Gap score (0-100)",
+                         colorscale=["#1B5E20","#FDD835","#B71C1C"], hover=MAP_HOVER)
+    elif mode == "Readiness Score":
+        fig = choropleth(countries, "readiness_score", "Readiness (0-10)",
+                         colorscale=["#B71C1C","#FDD835","#1B5E20"], hover=MAP_HOVER)
+    elif mode == "Recommended Tool":
+        fig = choropleth(
+            countries.join(data.country_recommendations[RECOMMENDATION_COLUMNS], on="iso_code"),
+            "recommended_tool", "Recommended tool", color_map=TOOL_COLORS,
+            hover=("recommendation_score", "runner_up", *MAP_HOVER[1:]),
+            labels={"recommendation_score": "Match score", "runner_up": "Runner-up"},
+        )
+    else:
+        cumulative = st.toggle("Cumulative", value=True, help="Count every study up to each year rather than only that year's")
+        fig = make_playback(year_range, scales, approaches, cumulative)
 
-if mode == "Gap Score":
-    st.caption("Gap score 0–100: higher = more under-served (accounts for African feature coverage, institutional capacity, data availability, model density)")
+    plotly_chart(fig, use_container_width=True)
+
+    if mode == "Recommended Tool":
+        st.caption(
+            "Best-matching tool for a profile derived from each country's electrification rate, "
+            "power pool, institutional capacity and data availability (see the Recommender page)."
+        )
+    elif mode == "Year Playback":
+        st.caption("Press ▶ to play through the selected year range; the scale and approach filters apply to every frame.")
+    elif mode == "Gap Score":
+        st.caption("Gap score 0–100: higher = more under-served (accounts for African feature coverage, institutional capacity, data availability, model density)")
+
+
+layer_map(countries, year_range, scales, approaches)
 
 st.divider()
 
 col1, col2 = st.columns(2)
 
 with col1:
-    pool_counts = {}
-    for _, row in filt.iterrows():
-        pools = [p.strip() for p in str(row.get("power_pool","")).split(",") if p.strip()]
-        seen = set()
-        for pool in pools:
-            if pool and pool not in seen:
-                pool_counts[pool] = pool_counts.get(pool, 0) + 1
-                seen.add(pool)
-    pool_agg = pd.DataFrame(list(pool_counts.items()), columns=["Power Pool","Studies"])
-    pool_agg = pool_agg[pool_agg["Power Pool"].isin(POOL_COLORS.keys())]
+    pool_agg = counts["pool"].rename_axis("Power Pool").reset_index(name="Studies")
+    pool_agg = pool_agg[pool_agg["Power Pool"].isin(POOL_COLORS.keys()) & (pool_agg["Studies"] > 0)]
     fig_r = px.bar(
         pool_agg.sort_values("Studies"),
         x="Studies", y="Power Pool", orientation="h",
@@ -169,16 +187,13 @@ with col1:
         title="Studies by Power Pool (including continental and regional scale)",
     )
     fig_r.update_layout(showlegend=False, height=260, margin={"t":40,"b":0,"l":0,"r":0})
-    st.plotly_chart(fig_r, use_container_width=True)
+    plotly_chart(fig_r, use_container_width=True)
 
 with col2:
-    from utils.data import load_tools
-    tools = load_tools()
-    model_counts = tools[["tool_name","nb_studies_in_inventory"]].copy()
+    model_counts = data.tools[["tool_name","nb_studies_in_inventory"]]
     model_counts.columns = ["Model","Studies"]
     model_counts = model_counts[model_counts["Studies"] > 0].nlargest(10,"Studies")
     model_counts["Model"] = model_counts["Model"].str.slice(0,22)
-    print(model_counts)
     fig_m = px.bar(
         model_counts.sort_values("Studies"),
         x="Studies", y="Model", orientation="h",
@@ -186,39 +201,57 @@ with col2:
         title="Top 10 Most-Applied Models",
     )
     fig_m.update_layout(height=260, margin={"t":40,"b":0,"l":0,"r":0})
-    st.plotly_chart(fig_m, use_container_width=True)
+    plotly_chart(fig_m, use_container_width=True)
 
 st.divider()
 
-st.subheader("Country detail")
-selected = st.selectbox(
-    "Select a country",
-    sorted(countries_full["country_name"].tolist()),
-    index=None,
-    placeholder="Choose a country..."
-)
+# ── Country detail ─────────────────────────────────────────────────────────────
+# Picking a country reruns only this panel
+@st.fragment
+def country_detail(year_range, scales, approaches):
+    st.subheader("Country detail")
+    selected = st.selectbox(
+        "Select a country",
+        sorted(countries_full["country_name"].tolist()),
+        index=None,
+        placeholder="Choose a country..."
+    )
 
-if selected:
-    row = countries_full[countries_full["country_name"]==selected].iloc[0]
-    iso = row["iso_code"]
-    c_studies = get_country_studies(filt, iso)
-
-    m1,m2,m3,m4,m5 = st.columns(5)
-    m1.metric("Studies (filtered)", len(c_studies))
-    m2.metric("Electrification", f"{row['electrification_rate']}%")
-    m3.metric("Gap score", f"{int(row['gap_score'])}/100")
-    m4.metric("Readiness", f"{row['readiness_score']}/10")
-    m5.metric("Data", row["data_availability"].title())
-
-    info_cols = st.columns(4)
-    info_cols[0].caption(f"**Region:** {row['region'].capitalize()}")
-    info_cols[1].caption(f"**Power pool:** {row['power_pool']}")
-    info_cols[2].caption(f"**NDC:** {'Yes' if row['has_ndc']=='yes' else 'No'}")
-    info_cols[3].caption(f"**Long-term strategy:** {'Yes' if row['has_lts']=='yes' else 'No'}")
-
-    if not c_studies.empty:
-        st.markdown(f"**{len(c_studies)} studies** cover {selected} in this period:")
-        dcols = [c for c in ["model_name","year","scale","approach","method","open_source","frequency","informal_economy","local_ownership","sdg_7","sdg_13"] if c in c_studies.columns]
-        st.dataframe(c_studies[dcols].reset_index(drop=True), use_container_width=True, hide_index=True)
-    else:
-        st.info("No studies match the current filters for this country.")
+    if selected:
+        row = countries_full[countries_full["country_name"]==selected].iloc[0]
+        iso = row["iso_code"]
+        filt = studies[data.study_filters.mask(data.study_filters.select({
+            "year": range(year_range[0], year_range[1] + 1),
+            "scale": scales,
+            "approach": approaches,
+        }))]
+        c_studies = get_country_studies(filt, iso, country_index)
+
+        m1,m2,m3,m4,m5 = st.columns(5)
+        m1.metric("Studies (filtered)", len(c_studies))
+        m2.metric("Electrification", f"{row['electrification_rate']}%")
+        m3.metric("Gap score", f"{int(row['gap_score'])}/100")
+        m4.metric("Readiness", f"{row['readiness_score']}/10")
+        m5.metric("Data", row["data_availability"].title() if pd.notna(row["data_availability"]) else "Unknown")
+
+        info_cols = st.columns(4)
+        info_cols[0].caption(f"**Region:** {row['region'].capitalize()}")
+        info_cols[1].caption(f"**Power pool:** {row['power_pool']}")
+        info_cols[2].caption(f"**NDC:** {FLAG_LABELS.get(row['has_ndc'], 'Unknown')}")
+        info_cols[3].caption(f"**Long-term strategy:** {FLAG_LABELS.get(row['has_lts'], 'Unknown')}")
+
+        if not c_studies.empty:
+            st.markdown(f"**{len(c_studies)} studies** cover {selected} in this period:")
+            dcols = [c for c in ["model_name","year","scale","approach","method","open_source","frequency","informal_economy","local_ownership","sdg_7","sdg_13"] if c in c_studies.columns]
+            dataframe(as_raw(c_studies[dcols], years=False).reset_index(drop=True), use_container_width=True, hide_index=True)
+            export_controls(
+                data.studies, c_studies.index, f"aisesa_studies_{iso}", key="map_export",
+                text=lambda: data.study_text, columns=data.study_columns,
+            )
+        else:
+            st.info("No studies match the current filters for this country.")
+
+
+country_detail(year_range, scales, approaches)
+
+payload_report("Map")
@@ -7,21 +7,21 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-from utils.data import load_countries, load_studies, enrich_countries
+from utils.data import as_raw
+from utils.maps import choropleth
+from utils.payload import dataframe, payload_report, plotly_chart, start_payload_report
+from utils.store import get_datasets
+from utils.scoring import READINESS_WEIGHTS, ReadinessWeights, score_countries
 from utils.ui import SIDEBAR_CSS
 
 st.set_page_config(page_title="Readiness | AISESA", layout="wide", page_icon="assets/aisesa_logo.png")
 st.html(SIDEBAR_CSS)
+start_payload_report()
 
 REGION_COLORS = {"north":"#1565C0","west":"#2E7D32","east":"#6A1B9A","central":"#E65100","southern":"#37474F"}
 
-@st.cache_data(ttl=3600)
-def get_data():
-    c = load_countries()
-    s = load_studies()
-    return enrich_countries(c, s), s
-
-countries, studies = get_data()
+data = get_datasets()
+countries, studies = data.countries, data.studies
 
 with st.sidebar:
     st.markdown("---")
@@ -39,6 +39,15 @@ with st.sidebar:
         "• Electrification rate: 0–2</p>",
         unsafe_allow_html=True,
     )
+    with st.expander("Adjust weights"):
+        readiness_weights = ReadinessWeights(
+            capacity=st.slider("Institutional capacity", 0.0, 5.0, float(READINESS_WEIGHTS.capacity), step=0.5),
+            data=st.slider("Data availability", 0.0, 5.0, float(READINESS_WEIGHTS.data), step=0.5),
+            ndc=st.slider("NDC commitment", 0.0, 5.0, float(READINESS_WEIGHTS.ndc), step=0.5),
+            lts=st.slider("Long-term strategy", 0.0, 5.0, float(READINESS_WEIGHTS.lts), step=0.5),
+            electrification=st.slider("Electrification rate", 0.0, 5.0, float(READINESS_WEIGHTS.electrification), step=0.5),
+        ).scaled(10)
+        st.caption("Weights are rescaled to sum to 10.")
     st.markdown("---")
     st.markdown(
         "<p style='font-size:0.78rem; color:#8FBCA8; text-transform:uppercase; letter-spacing:0.08em; font-weight:700;'>Filters</p>",
@@ -53,6 +62,9 @@ with st.sidebar:
         unsafe_allow_html=True,
     )
 
+if readiness_weights != READINESS_WEIGHTS:
+    countries = score_countries(countries, readiness_weights=readiness_weights)
+
 st.title("Readiness Indicators")
 st.markdown("Readiness score (0–10): institutional capacity, data availability, NDC, long-term strategy, and electrification rate.")
 
@@ -60,31 +72,23 @@ k1, k2, k3, k4 = st.columns(4)
 k1.metric("Avg readiness score", f"{countries['readiness_score'].mean():.1f}/10")
 k2.metric("Good data availability", int(countries["data_availability"].eq("good").sum()), delta="of 54 countries", delta_color="off")
 k3.metric("Full institutional capacity", int(countries["has_institutional_capacity"].eq("yes").sum()), delta="of 54 countries", delta_color="off")
-k4.metric("Have long-term strategy", int(countries["has_lts"].eq("yes").sum()), delta="of 54 countries", delta_color="off")
+k4.metric("Have long-term strategy", int(countries["has_lts"].sum()), delta="of 54 countries", delta_color="off")
 
 st.divider()
 
-fig_map = px.choropleth(
-    countries, locations="iso3", color="readiness_score",
-    color_continuous_scale=["#B71C1C","#FDD835","#1B5E20"],
-    hover_name="country_name",
-    hover_data={"readiness_score":True,"electrification_rate":True,"data_availability":True,
-                "has_institutional_capacity":True,"iso3":False},
-    scope="africa", labels={"readiness_score":"Readiness"}, title="Readiness Score Map",
+fig_map = choropleth(
+    countries, "readiness_score", "Readiness",
+    colorscale=["#B71C1C","#FDD835","#1B5E20"],
+    hover=("readiness_score","electrification_rate","data_availability","has_institutional_capacity"),
+    title="Readiness Score Map", height=400, top=40, colorbar=dict(title=dict(text="Score"), len=0.8),
 )
-fig_map.update_geos(showframe=False, showcoastlines=True, coastlinecolor="#ccc",
-                    showland=True, landcolor="#F0F4F0", showocean=True, oceancolor="#E3EEF9",
-                    showcountries=True, countrycolor="#ccc")
-fig_map.update_layout(margin={"r":0,"t":40,"l":0,"b":0}, height=400,
-                      coloraxis_colorbar=dict(title="Score", len=0.8))
-st.plotly_chart(fig_map, use_container_width=True)
+plotly_chart(fig_map, use_container_width=True)
 
 st.divider()
 
 col1, col2 = st.columns(2)
 with col1:
-    scatter_df = countries.copy()
-    scatter_df["Region"] = scatter_df["region"].str.capitalize()
+    scatter_df = countries.assign(Region=countries["region"].str.capitalize())
     fig_sc = px.scatter(
         scatter_df, x="electrification_rate", y="nb_models_applied",
         color="Region",
@@ -96,13 +100,13 @@ with col1:
     )
     fig_sc.update_traces(marker=dict(size=9, opacity=0.85))
     fig_sc.update_layout(height=320, margin={"t":40,"b":0,"l":0,"r":0})
-    st.plotly_chart(fig_sc, use_container_width=True)
+    plotly_chart(fig_sc, use_container_width=True)
 
 with col2:
     bins = [0,2,4,6,8,10.1]
     labels = ["0–2","2–4","4–6","6–8","8–10"]
-    countries["readiness_bin"] = pd.cut(countries["readiness_score"], bins=bins, labels=labels, right=False)
-    dist = countries["readiness_bin"].value_counts().reindex(labels).reset_index()
+    readiness_bin = pd.cut(countries["readiness_score"], bins=bins, labels=labels, right=False)
+    dist = readiness_bin.value_counts().reindex(labels).reset_index()
     dist.columns = ["Range","Count"]
     fig_dist = px.bar(dist, x="Range", y="Count",
                       color_discrete_sequence=["#2E7D32"], text="Count",
@@ -110,7 +114,7 @@ with col2:
                       labels={"Range":"Score Range","Count":"Countries"})
     fig_dist.update_traces(textposition="outside")
     fig_dist.update_layout(height=320, margin={"t":40,"b":0,"l":0,"r":0})
-    st.plotly_chart(fig_dist, use_container_width=True)
+    plotly_chart(fig_dist, use_container_width=True)
 
 st.divider()
 
@@ -126,7 +130,7 @@ with col_f3:
 with col_f4:
     cap_sel = st.selectbox("Capacity", ["All","yes","partial","no"])
 
-filtered = countries.copy()
+filtered = countries
 if search:
     filtered = filtered[filtered["country_name"].str.lower().str.contains(search.lower())]
 if region_sel != "All":
@@ -141,13 +145,13 @@ if dat_filter:
     filtered = filtered[filtered["data_availability"].isin(dat_filter)]
 filtered = filtered.sort_values(sort_by, ascending=False)
 
-display = filtered[["country_name","region","power_pool","nb_models_applied",
-                     "readiness_score","gap_score","electrification_rate",
-                     "data_availability","has_institutional_capacity","has_ndc","has_lts"]].copy()
+display = as_raw(filtered[["country_name","region","power_pool","nb_models_applied",
+                            "readiness_score","gap_score","electrification_rate",
+                            "data_availability","has_institutional_capacity","has_ndc","has_lts"]])
 display.columns = ["Country","Region","Pool","Studies","Readiness","Gap","Electrification %","Data","Capacity","NDC","LTS"]
 display["Region"] = display["Region"].str.capitalize()
 
-st.dataframe(
+dataframe(
     display.reset_index(drop=True), use_container_width=True, hide_index=True,
     column_config={
         "Readiness": st.column_config.ProgressColumn("Readiness", min_value=0, max_value=10, format="%.1f"),
@@ -156,3 +160,5 @@ st.dataframe(
     },
 )
 st.caption(f"Showing {len(display)} of {len(countries)} countries")
+
+payload_report("Readiness")
@@ -6,18 +6,84 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import streamlit as st
 import plotly.express as px
-import pandas as pd
-from utils.data import load_studies, load_countries
-from utils.ui import SIDEBAR_CSS
+from utils.data import TECH_COLUMNS, as_raw, tech_coverage
+from utils.paging import frame_key, n_pages, table_page
+from utils.payload import dataframe, payload_report, plotly_chart, start_payload_report
+from utils.store import get_datasets
+from utils.ui import SIDEBAR_CSS, export_controls
 
 st.set_page_config(page_title="Browse Studies | AISESA", layout="wide", page_icon="assets/aisesa_logo.png")
 st.html(SIDEBAR_CSS)
+start_payload_report()
+
+data = get_datasets()
+studies, countries, study_filters = data.studies, data.countries, data.study_filters
+
+# ── Current filter state ────────────────────────────────────────────────────────
+# Read from session state before the widgets are drawn, so every option label can
+# show how many studies it would match given all the other active filters.
+MULTI_FILTERS = {
+    "scale": "f_scale", "approach": "f_approach", "method": "f_method",
+    "frequency": "f_freq", "open_source": "f_license",
+}
+FLAG_FILTERS = {
+    "informal_economy":  ("f_informal", "Covers informal economy"),
+    "biomass_charcoal":  ("f_biomass", "Covers biomass/charcoal"),
+    "power_reliability": ("f_reliability", "Covers power reliability"),
+    "urbanization":      ("f_urban", "Covers urbanization"),
+    "sdg_7":             ("f_sdg7", "SDG 7 aligned"),
+    "sdg_13":            ("f_sdg13", "SDG 13 aligned"),
+    "ndc_mention":       ("f_ndc", "Mentions NDC"),
+    "local_ownership":   ("f_local", "Local ownership (African-led)"),
+}
+state = st.session_state
+
+def yes_value(col):
+    """Indexed value meaning "yes": ``True`` for boolean flags, ``"yes"`` for yes / partial / no levels."""
+    return True if studies[col].dtype.kind == "b" else "yes"
+
+year_range = state.get("f_year", (2010, 2025))
+# OR within each column, AND across columns, evaluated on the packed bitmaps
+active_filters = {
+    "year": range(year_range[0], year_range[1] + 1),
+    **{col: state.get(key, []) for col, key in MULTI_FILTERS.items()},
+    **{col: [yes_value(col)] if state.get(key, False) else None for col, (key, _) in FLAG_FILTERS.items()},
+    **{tech: [True] for tech in state.get("f_tech", [])},
+}
+facets = study_filters.facet_counts(active_filters)
+
+def facet_options(col):
+    return [v for v in study_filters.values(col) if v]
+
+def with_count(col):
+    return lambda v: f"{v} ({facets[col].get(v, 0)})"
+
+# Studies table columns and their display labels
+TABLE_COLUMNS = {
+    "id":"ID","model_name":"Model","authors":"Authors","year":"Year",
+    "scale":"Scale","approach":"Approach","method":"Method",
+    "open_source":"License","frequency":"Frequency",
+    "informal_economy":"Informal Econ.","biomass_charcoal":"Biomass",
+    "power_reliability":"Reliability","urbanization":"Urban",
+    "sdg_7":"SDG 7","sdg_13":"SDG 13","ndc_mention":"NDC",
+    "local_ownership":"Local","developer_origin":"Developer",
+    "countries":"Countries",
+}
+PAGE_SIZES = [25, 50, 100, 250]
+
+def format_studies(rows):
+    """One page of studies as displayed: renamed columns, long text truncated for readability."""
+    disp = as_raw(rows[[c for c in TABLE_COLUMNS if c in rows.columns]], years=False).rename(columns=TABLE_COLUMNS)
+    disp = disp.reset_index(drop=True)
+    if "Authors" in disp.columns:
+        disp["Authors"] = disp["Authors"].str.slice(0,40)
+    if "Countries" in disp.columns:
+        disp["Countries"] = disp["Countries"].str.slice(0,60) + "…"
+    return disp
 
-@st.cache_data(ttl=3600)
-def get_data():
-    return load_studies(), load_countries()
-
-studies, countries = get_data()
+def flag_checkbox(col):
+    key, label = FLAG_FILTERS[col]
+    st.checkbox(f"{label} ({facets.get(col, {}).get(yes_value(col), 0)})", key=key)
 
 # ── Sidebar filters ─────────────────────────────────────────────────────────────
 with st.sidebar:
@@ -27,51 +93,42 @@ with st.sidebar:
         unsafe_allow_html=True,
     )
 
-    year_range = st.slider("Publication year", 2010, 2025, (2010, 2025))
-
-    scale_opts = sorted([s for s in studies["scale"].dropna().unique() if s])
-    scales = st.multiselect("Scale", scale_opts, default=[], placeholder="All", label_visibility="visible")
-
-    approach_opts = sorted([a for a in studies["approach"].dropna().unique() if a])
-    approaches = st.multiselect("Approach", approach_opts, default=[], placeholder="All")
-
-    method_opts = sorted([m for m in studies["method"].dropna().unique() if m])
-    methods = st.multiselect("Method", method_opts, default=[], placeholder="All")
-
-    freq_opts = sorted([f for f in studies["frequency"].dropna().unique() if f])
-    freqs = st.multiselect("Usage frequency", freq_opts, default=[], placeholder="All")
-
-    lic_opts = sorted([l for l in studies["open_source"].dropna().unique() if l])
-    lics = st.multiselect("License", lic_opts, default=[], placeholder="All")
+    st.slider("Publication year", 2010, 2025, (2010, 2025), key="f_year")
+    st.multiselect("Scale", facet_options("scale"), default=[], placeholder="All",
+                   key="f_scale", format_func=with_count("scale"))
+    st.multiselect("Approach", facet_options("approach"), default=[], placeholder="All",
+                   key="f_approach", format_func=with_count("approach"))
+    st.multiselect("Method", facet_options("method"), default=[], placeholder="All",
+                   key="f_method", format_func=with_count("method"))
+    st.multiselect("Usage frequency", facet_options("frequency"), default=[], placeholder="All",
+                   key="f_freq", format_func=with_count("frequency"))
+    st.multiselect("License", facet_options("open_source"), default=[], placeholder="All",
+                   key="f_license", format_func=with_count("open_source"))
 
     st.markdown("---")
     st.markdown(
         "<p style='font-size:0.78rem; color:#8FBCA8; text-transform:uppercase; letter-spacing:0.08em; font-weight:700;'>African features</p>",
         unsafe_allow_html=True,
     )
-    f_informal = st.checkbox("Covers informal economy")
-    f_biomass  = st.checkbox("Covers biomass/charcoal")
-    f_reliability = st.checkbox("Covers power reliability")
-    f_urban    = st.checkbox("Covers urbanization")
+    for col in ["informal_economy", "biomass_charcoal", "power_reliability", "urbanization"]:
+        flag_checkbox(col)
 
     st.markdown("---")
     st.markdown(
         "<p style='font-size:0.78rem; color:#8FBCA8; text-transform:uppercase; letter-spacing:0.08em; font-weight:700;'>SDG & policy</p>",
         unsafe_allow_html=True,
     )
-    f_sdg7  = st.checkbox("SDG 7 aligned")
-    f_sdg13 = st.checkbox("SDG 13 aligned")
-    f_ndc   = st.checkbox("Mentions NDC")
-    f_local = st.checkbox("Local ownership (African-led)")
+    for col in ["sdg_7", "sdg_13", "ndc_mention", "local_ownership"]:
+        flag_checkbox(col)
 
     st.markdown("---")
     st.markdown(
         "<p style='font-size:0.78rem; color:#8FBCA8; text-transform:uppercase; letter-spacing:0.08em; font-weight:700;'>Technology</p>",
         unsafe_allow_html=True,
     )
-    tech_cols = ["solar","wind","hydro","biomass","nuclear","geothermal","fossil","h2","coal"]
-    tech_avail = [t for t in tech_cols if t in studies.columns]
-    selected_techs = st.multiselect("Must include technology", tech_avail, default=[], placeholder="Any")
+    tech_avail = [t for t in TECH_COLUMNS if t in studies.columns]
+    st.multiselect("Must include technology", tech_avail, default=[], placeholder="Any",
+                   key="f_tech", format_func=lambda t: f"{t} ({facets[t].get(True, 0)})")
 
     st.markdown("---")
     st.markdown(
@@ -80,23 +137,7 @@ with st.sidebar:
     )
 
 # ── Apply filters ───────────────────────────────────────────────────────────────
-filt = studies[studies["year"].between(year_range[0], year_range[1], inclusive="both")].copy()
-if scales:       filt = filt[filt["scale"].isin(scales)]
-if approaches:   filt = filt[filt["approach"].isin(approaches)]
-if methods:      filt = filt[filt["method"].isin(methods)]
-if freqs:        filt = filt[filt["frequency"].isin(freqs)]
-if lics:         filt = filt[filt["open_source"].isin(lics)]
-if f_informal:   filt = filt[filt["informal_economy"].eq("yes")]
-if f_biomass:    filt = filt[filt["biomass_charcoal"].eq("yes")]
-if f_reliability:filt = filt[filt["power_reliability"].eq("yes")]
-if f_urban:      filt = filt[filt["urbanization"].eq("yes")]
-if f_sdg7 and "sdg_7" in filt.columns:    filt = filt[filt["sdg_7"].eq("yes")]
-if f_sdg13 and "sdg_13" in filt.columns:  filt = filt[filt["sdg_13"].eq("yes")]
-if f_ndc and "ndc_mention" in filt.columns: filt = filt[filt["ndc_mention"].eq("yes")]
-if f_local:      filt = filt[filt["local_ownership"].eq("yes")]
-for tech in selected_techs:
-    if tech in filt.columns:
-        filt = filt[filt[tech].eq("yes")]
+filt = studies[study_filters.mask(study_filters.select(active_filters))]
 
 # ── Header ──────────────────────────────────────────────────────────────────────
 st.title("Browse Studies")
@@ -106,14 +147,12 @@ with col_h1:
         f"Showing **{len(filt)}** of **{len(studies)}** studies matching your filters."
     )
 with col_h2:
-    search_text = st.text_input("Search model / author", placeholder="e.g. LEAP, OSeMOSYS...", label_visibility="collapsed")
+    search_text = st.text_input("Search studies", placeholder="e.g. LEAP, OSeMOSYS, off-grid...", label_visibility="collapsed")
 if search_text:
-    mask = (
-        filt["model_name"].str.lower().str.contains(search_text.lower(), na=False) |
-        filt["authors"].str.lower().str.contains(search_text.lower(), na=False)
-    )
-    filt = filt[mask]
-    st.caption(f"After text search: {len(filt)} results")
+    # Ranked hits from the full-text index, restricted to the filtered rows
+    hits = data.study_search.search(search_text)
+    filt = filt.loc[hits.index.intersection(filt.index, sort=False)]
+    st.caption(f"After text search: {len(filt)} results, most relevant first")
 
 st.divider()
 
@@ -129,30 +168,30 @@ if len(filt) > 0:
                         title="By Year", height=180)
         fig_yr.update_layout(margin={"t":40,"b":0,"l":0,"r":0}, showlegend=False,
                              xaxis=dict(tickmode="linear", dtick=5))
-        st.plotly_chart(fig_yr, use_container_width=True)
+        plotly_chart(fig_yr, use_container_width=True)
 
     with chart_cols[1]:
-        sc = filt["scale"].replace("","unspecified").value_counts().reset_index()
+        sc = filt["scale"].value_counts().loc[lambda c: c > 0].rename({"": "unspecified"}).reset_index()
         sc.columns = ["Scale","Count"]
         fig_sc = px.pie(sc, names="Scale", values="Count", hole=0.4,
                         title="By Scale", height=180,
                         color_discrete_sequence=px.colors.qualitative.Set2)
         fig_sc.update_layout(margin={"t":40,"b":0,"l":0,"r":0},
                              legend=dict(font=dict(size=9)))
-        st.plotly_chart(fig_sc, use_container_width=True)
+        plotly_chart(fig_sc, use_container_width=True)
 
     with chart_cols2[0]:
-        ap = filt["approach"].replace("","unspecified").value_counts().reset_index()
+        ap = filt["approach"].value_counts().loc[lambda c: c > 0].rename({"": "unspecified"}).reset_index()
         ap.columns = ["Approach","Count"]
         fig_ap = px.pie(ap, names="Approach", values="Count", hole=0.4,
                         title="By Approach", height=180,
                         color_discrete_sequence=["#2E7D32","#1565C0","#E65100","#9E9E9E"])
         fig_ap.update_layout(margin={"t":40,"b":0,"l":0,"r":0},
                              legend=dict(font=dict(size=9)))
-        st.plotly_chart(fig_ap, use_container_width=True)
+        plotly_chart(fig_ap, use_container_width=True)
 
     with chart_cols2[1]:
-        freq = filt["frequency"].value_counts().reset_index()
+        freq = filt["frequency"].value_counts().loc[lambda c: c > 0].reset_index()
         freq.columns = ["Frequency","Count"]
         freq["Frequency"] = freq["Frequency"].str.replace("_"," ").str.capitalize()
         fig_fr = px.bar(freq, x="Frequency", y="Count", color_discrete_sequence=["#1565C0"],
@@ -160,14 +199,14 @@ if len(filt) > 0:
         fig_fr.update_traces(textposition="outside")
         fig_fr.update_layout(margin={"t":40,"b":0,"l":0,"r":0},
                              xaxis_title="", yaxis_title="")
-        st.plotly_chart(fig_fr, use_container_width=True)
+        plotly_chart(fig_fr, use_container_width=True)
 
     # Technology heatmap
     st.markdown("#### Technology coverage in filtered studies")
-    tech_avail_full = [t for t in ["solar","wind","hydro","biomass","nuclear","geothermal","fossil","h2","coal"] if t in filt.columns]
+    tech_avail_full = [t for t in TECH_COLUMNS if t in filt.columns]
     if tech_avail_full:
-        tech_pct = {t: round(filt[t].eq("yes").sum()/len(filt)*100,1) for t in tech_avail_full}
-        tech_df = pd.DataFrame(list(tech_pct.items()), columns=["Technology","Coverage (%)"])
+        tech_pct = (tech_coverage(filt)[tech_avail_full] * 100).round(1)
+        tech_df = tech_pct.rename_axis("Technology").reset_index(name="Coverage (%)")
         tech_df = tech_df.sort_values("Coverage (%)", ascending=True)
         fig_tech = px.bar(
             tech_df, x="Coverage (%)", y="Technology", orientation="h",
@@ -178,40 +217,33 @@ if len(filt) > 0:
         fig_tech.update_traces(textposition="outside")
         fig_tech.update_layout(margin={"t":10,"b":0,"l":0,"r":40},
                                showlegend=False, coloraxis_showscale=False)
-        st.plotly_chart(fig_tech, use_container_width=True)
+        plotly_chart(fig_tech, use_container_width=True)
 
     st.divider()
 
     # ── Studies table ───────────────────────────────────────────────────────────
     st.markdown("#### Studies table")
 
-    display_cols = [c for c in [
-        "id","model_name","authors","year","scale","approach","method",
-        "open_source","frequency","informal_economy","biomass_charcoal",
-        "power_reliability","urbanization","sdg_7","sdg_13","ndc_mention",
-        "local_ownership","developer_origin","countries",
-    ] if c in filt.columns]
-
-    rename = {
-        "id":"ID","model_name":"Model","authors":"Authors","year":"Year",
-        "scale":"Scale","approach":"Approach","method":"Method",
-        "open_source":"License","frequency":"Frequency",
-        "informal_economy":"Informal Econ.","biomass_charcoal":"Biomass",
-        "power_reliability":"Reliability","urbanization":"Urban",
-        "sdg_7":"SDG 7","sdg_13":"SDG 13","ndc_mention":"NDC",
-        "local_ownership":"Local","developer_origin":"Developer",
-        "countries":"Countries",
-    }
-
-    disp = filt[display_cols].rename(columns=rename).reset_index(drop=True)
-    # Truncate authors and countries for readability
-    if "Authors" in disp.columns:
-        disp["Authors"] = disp["Authors"].str.slice(0,40)
-    if "Countries" in disp.columns:
-        disp["Countries"] = disp["Countries"].str.slice(0,60) + "…"
-
-    st.dataframe(
-        disp,
+    # Sorted server-side, and only the visible page is sliced and formatted;
+    # pages are cached per filter state so paging and reruns skip the work
+    table_cols = {c: label for c, label in TABLE_COLUMNS.items() if c in filt.columns}
+    tc = st.columns([3, 2, 2, 2])
+    sort_label = tc[0].selectbox("Sort by", ["Default order", *table_cols.values()],
+                              help="Inventory order, or best match first when searching", key="t_sort")
+    descending = tc[1].toggle("Descending", key="t_desc")
+    page_size = tc[2].selectbox("Rows per page", PAGE_SIZES, index=1, key="t_size")
+    pages = n_pages(len(filt), page_size)
+    if state.get("t_page", 1) > pages:
+        state["t_page"] = 1
+    page = tc[3].number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key="t_page")
+
+    sort_by = next((c for c, label in table_cols.items() if label == sort_label), None)
+    rows = table_page(
+        filt, frame_key(filt, data.versions.get("studies.csv")), format_studies,
+        page, page_size, sort_by, ascending=not descending,
+    )
+    dataframe(
+        rows,
         use_container_width=True,
         hide_index=True,
         height=450,
@@ -219,7 +251,16 @@ if len(filt) > 0:
             "Year": st.column_config.NumberColumn(format="%d"),
         },
     )
-    st.caption(f"{len(filt)} studies shown. Use sidebar filters to narrow down.")
+    first = (page - 1) * page_size
+    st.caption(
+        f"Studies {first + 1}–{first + len(rows)} of {len(filt)}. Use sidebar filters to narrow down."
+    )
+    export_controls(
+        data.studies, filt.index, "aisesa_studies", key="browse_export",
+        text=lambda: data.study_text, columns=data.study_columns,
+    )
 
 else:
     st.warning("No studies match the current filters. Try relaxing some constraints.")
+
+payload_report("Browse Studies")
@@ -6,17 +6,17 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import streamlit as st
 import pandas as pd
-from utils.data import load_tools
+from utils.payload import dataframe, payload_report, start_payload_report
+from utils.recommend import QUESTIONS, RULES
+from utils.store import get_datasets
 from utils.ui import SIDEBAR_CSS
 
 st.set_page_config(page_title="Recommender | AISESA", layout="wide", page_icon="assets/aisesa_logo.png")
 st.html(SIDEBAR_CSS)
+start_payload_report()
 
-@st.cache_data(ttl=3600)
-def get_tools():
-    return load_tools()
-
-tools = get_tools()
+data = get_datasets()
+tools, recommendations = data.tools, data.recommendations
 
 with st.sidebar:
     st.markdown("---")
@@ -50,113 +50,47 @@ col_q1, col_q2 = st.columns(2)
 with col_q1:
     policy_q = st.selectbox(
         "1. Primary policy question / objective",
-        ["National energy planning (supply mix, capacity expansion)",
-         "Electrification / energy access (off-grid, mini-grid)",
-         "Regional power trade (interconnections, power pools)",
-         "Short-term dispatch and grid flexibility",
-         "Climate-energy-water-land nexus",
-         "Demand forecasting",
-         "Environmental / climate impact assessment"],
+        QUESTIONS["policy"],
         index=None, placeholder="Select your primary objective...",
     )
     scale_q = st.selectbox(
         "2. Scale of analysis",
-        ["National","Sub-national / state / province","Regional / multi-country","Continental"],
+        QUESTIONS["scale"],
         index=None, placeholder="Select scale...",
     )
     budget_q = st.selectbox(
         "3. Budget constraint",
-        ["Zero budget (open source only)","Low / freemium acceptable","Any budget"],
+        QUESTIONS["budget"],
         index=None, placeholder="Select budget...",
     )
 
 with col_q2:
     capacity_q = st.selectbox(
         "4. Team technical capacity",
-        ["Limited (no programming, GUI-only)",
-         "Intermediate (scripting, some technical skills)",
-         "Advanced (Python, Julia, full programming)"],
+        QUESTIONS["capacity"],
         index=None, placeholder="Select capacity level...",
     )
     horizon_q = st.selectbox(
         "5. Time horizon of analysis",
-        ["Long-term (2030–2060, strategic planning)",
-         "Medium-term (5–15 years)",
-         "Short-term / sub-annual dispatch"],
+        QUESTIONS["horizon"],
         index=None, placeholder="Select time horizon...",
     )
     data_q = st.selectbox(
         "6. Data availability in your context",
-        ["Good — detailed national statistics available",
-         "Moderate — some gaps, proxy data needed",
-         "Limited — data-scarce, low-income context"],
+        QUESTIONS["data"],
         index=None, placeholder="Select data situation...",
     )
 
 run = st.button("Get Recommendations", type="primary")
 st.divider()
 
-def score_tool(tool, policy_q, scale_q, budget_q, capacity_q, horizon_q, data_q):
-    s = 0
-    bf  = str(tool.get("best_for",""))
-    lc  = str(tool.get("learning_curve","medium"))
-    prog= str(tool.get("programming_required","none"))
-    lic = str(tool.get("license",""))
-    fd  = tool.get("free_for_developing","no") == "yes"
-    tr  = tool.get("training_available","no") == "yes"
-    studies = int(tool.get("nb_studies_in_inventory",0))
-    name = str(tool.get("tool_name",""))
-
-    if policy_q:
-        if "National energy planning" in policy_q and "national_planning" in bf: s += 30
-        if "Electrification" in policy_q and "electrification" in bf: s += 30
-        if "Regional power trade" in policy_q and "regional_trade" in bf: s += 30
-        if "dispatch" in policy_q and "dispatch_flexibility" in bf: s += 30
-        if "nexus" in policy_q and "nexus" in bf: s += 30
-        if "Demand" in policy_q and "demand_forecasting" in bf: s += 30
-        if "Environmental" in policy_q and "environmental" in bf: s += 30
-
-    if budget_q:
-        if "Zero budget" in budget_q:
-            if lic == "open_source": s += 15
-            elif lic == "proprietary": s -= 25
-        elif "Low" in budget_q:
-            if lic in ("open_source","freemium"): s += 10
-            elif lic == "proprietary": s -= 10
-
-    if capacity_q:
-        if "Limited" in capacity_q:
-            if prog == "none": s += 15
-            elif prog == "advanced": s -= 20
-        elif "Intermediate" in capacity_q:
-            if prog in ("none","intermediate"): s += 8
-        elif "Advanced" in capacity_q:
-            if prog == "advanced": s += 10
-
-    if horizon_q:
-        long_tools  = ["OSeMOSYS","TIMES","MESSAGE","LEAP","TEMBA","CLEWs","Balmorel"]
-        short_tools = ["FlexTool","PLEXOS","Dispa-SET","SWITCH","EnergyPLAN"]
-        if "Long-term" in horizon_q and any(t in name for t in long_tools): s += 10
-        if "Short-term" in horizon_q and any(t in name for t in short_tools): s += 10
-
-    if scale_q:
-        if "Sub-national" in scale_q and "electrification" in bf: s += 8
-        if "Regional" in scale_q and "regional_trade" in bf: s += 8
-
-    if data_q and "Limited" in data_q:
-        if lc in ("low","medium"): s += 5
-
-    if tr: s += 5
-    if studies >= 10: s += 10
-    elif studies >= 5: s += 5
-    return s
-
 if run:
-    scored = []
-    for _, t in tools.iterrows():
-        sc = score_tool(t.to_dict(), policy_q, scale_q, budget_q, capacity_q, horizon_q, data_q)
-        scored.append({**t.to_dict(), "match_score": sc})
-    scored_df = pd.DataFrame(scored).sort_values("match_score", ascending=False).head(8)
+    # One lookup into the table precomputed over every possible answer set
+    ranked = recommendations.ranked(
+        policy=policy_q, scale=scale_q, budget=budget_q,
+        capacity=capacity_q, horizon=horizon_q, data=data_q,
+    ).head(8)
+    scored_df = tools.loc[ranked.index].assign(match_score=ranked.to_numpy())
 
     st.subheader("Recommended Tools")
     top3 = scored_df.head(3).reset_index(drop=True)
@@ -184,10 +118,10 @@ if run:
     display_df = scored_df[[
         "tool_name","license","learning_curve","programming_required",
         "training_available","free_for_developing","nb_studies_in_inventory","best_for","match_score"
-    ]].copy()
+    ]]
     display_df.columns = ["Tool","License","Learning","Programming","Training","Free LICs","Africa Studies","Best For","Score"]
     display_df["Best For"] = display_df["Best For"].str.replace("_"," ").str.replace(","," · ")
-    st.dataframe(
+    dataframe(
         display_df.reset_index(drop=True), use_container_width=True, hide_index=True,
         column_config={
             "Score": st.column_config.ProgressColumn("Score", min_value=0, max_value=80, format="%d"),
@@ -200,11 +134,29 @@ else:
     ref_df = tools[[
         "tool_name","full_name","license","learning_curve",
         "programming_required","free_for_developing","nb_studies_in_inventory","best_for"
-    ]].copy()
+    ]]
     ref_df.columns = ["Tool","Full Name","License","Learning","Programming","Free LICs","Africa Studies","Best For"]
     ref_df["Best For"] = ref_df["Best For"].str.replace("_"," ").str.replace(","," · ")
+    # Share of all possible questionnaire answers that put the tool in the top 3
+    ref_df["Top-3 reach"] = recommendations.top_share(3) * 100
     ref_df = ref_df.sort_values("Africa Studies", ascending=False)
-    st.dataframe(
+    dataframe(
         ref_df.reset_index(drop=True), use_container_width=True, hide_index=True,
-        column_config={"Africa Studies": st.column_config.NumberColumn()},
+        column_config={
+            "Africa Studies": st.column_config.NumberColumn(),
+            "Top-3 reach": st.column_config.NumberColumn(
+                format="%.1f%%", help="Share of all questionnaire answer combinations that rank this tool in the top 3",
+            ),
+        },
     )
+
+with st.expander("Scoring rules"):
+    rules = pd.DataFrame(RULES).assign(
+        question=lambda r: r["question"].fillna("(always)"),
+        answer=lambda r: r["answer"].fillna(""),
+        values=lambda r: r["values"].map(", ".join),
+    )
+    rules.columns = ["Question", "Answer contains", "Tool feature", "Feature values", "Points"]
+    dataframe(rules, use_container_width=True, hide_index=True)
+
+payload_report("Recommender")
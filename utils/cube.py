@@ -0,0 +1,79 @@
+"""Year-indexed prefix-sum cube of study counts."""
+
+import numpy as np
+import pandas as pd
+
+
+class YearCube:
+    """
+    Study counts by year × scale × approach × entity, cumulated along the
+    year axis. Entities are the columns of one or more boolean study ×
+    entity membership frames (countries, power pools...). Any year range
+    then reduces to one subtraction of two year slabs, and any scale /
+    approach selection to a masked sum.
+    """
+
+    def __init__(self, studies: pd.DataFrame, memberships: dict[str, pd.DataFrame],
+                 dims: tuple[str, str] = ("scale", "approach")):
+        years = studies["year"]
+        known = years.dropna()
+        # No study with a year (empty table, or every year blank): no year
+        # slots, so every range counts zero
+        self.first_year = int(known.min()) if len(known) else 0
+        self.last_year = int(known.max()) if len(known) else -1
+        n_years = self.last_year - self.first_year + 1
+
+        # Entities from every membership frame side by side, plus one that
+        # every study belongs to for the overall count
+        members = pd.concat(
+            {**memberships, "all": pd.DataFrame({"": True}, index=studies.index)}, axis=1
+        ).reindex(studies.index, fill_value=False)
+        self.entities = members.columns
+
+        codes, self.levels = [], []
+        for dim in dims:
+            c, uniques = pd.factorize(studies[dim], sort=True)
+            codes.append(c)
+            self.levels.append(uniques.tolist())
+        shape = (n_years, *(len(levels) for levels in self.levels))
+
+        valid = years.notna().to_numpy() & np.logical_and.reduce([c >= 0 for c in codes])
+        cell = np.ravel_multi_index(
+            (years.to_numpy()[valid].astype(int) - self.first_year, *(c[valid] for c in codes)), shape
+        )
+        counts = np.zeros((int(np.prod(shape)), len(self.entities)), dtype=np.int64)
+        np.add.at(counts, cell, members.to_numpy(dtype=np.int64)[valid])
+        counts = counts.reshape(*shape, len(self.entities))
+        # Leading zero slab so that years [y0, y1] = cum[y1 + 1] - cum[y0]
+        self.cum = np.concatenate([np.zeros((1, *counts.shape[1:]), dtype=np.int64), counts.cumsum(axis=0)])
+
+    def _year_slot(self, year: int) -> int:
+        return min(max(year - self.first_year, 0), self.last_year - self.first_year + 1)
+
+    def counts(self, year_range: tuple[int, int], *selections) -> pd.Series:
+        """
+        Studies per entity published within ``year_range`` (inclusive) whose
+        dims take one of the selected values. An empty selection keeps every
+        value of that dim.
+        """
+        slab = self.cum[self._year_slot(year_range[1] + 1)] - self.cum[self._year_slot(year_range[0])]
+        for axis, (levels, selected) in enumerate(zip(self.levels, selections)):
+            if selected:
+                slab = np.compress(np.isin(levels, list(selected)), slab, axis=axis)
+        total = slab.sum(axis=tuple(range(len(self.levels))))
+        return pd.Series(total, index=self.entities)
+
+    def yearly(self, year_range: tuple[int, int], *selections, cumulative: bool = False) -> pd.DataFrame:
+        """
+        Year × entity table of counts for every year in ``year_range``, either
+        per year or cumulative from the range's first year.
+        """
+        years = np.arange(year_range[0], year_range[1] + 1)
+        ends = self.cum[[self._year_slot(y + 1) for y in years]]
+        starts = self.cum[[self._year_slot(y) for y in (years[:1] if cumulative else years)]]
+        block = ends - starts
+        for axis, (levels, selected) in enumerate(zip(self.levels, selections)):
+            if selected:
+                block = np.compress(np.isin(levels, list(selected)), block, axis=axis + 1)
+        totals = block.sum(axis=tuple(range(1, len(self.levels) + 1)))
+        return pd.DataFrame(totals, index=pd.Index(years, name="year"), columns=self.entities)
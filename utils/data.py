@@ -1,10 +1,27 @@
 """Data loading and computation utilities for AISESA Energy Models Africa."""
 
-import re
-import pandas as pd
+import hashlib
+import logging
+import os
 from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from utils.scoring import (
+    GAP_WEIGHTS, READINESS_WEIGHTS, GapWeights, ReadinessWeights,
+    gap_scores, readiness_scores, score_countries,
+)
+
+log = logging.getLogger(__name__)
 
 BASE = Path(__file__).parent.parent / "data"
+SOURCES = ("countries.csv", "studies.csv", "tools.csv", "power_pools.csv")
+# Cleaned, typed frames are cached here as Parquet, keyed on each CSV's content hash.
+# Bump CACHE_VERSION whenever a parser below changes its output.
+CACHE_DIR = BASE.parent / ".cache"
+CACHE_VERSION = 7
 
 # ISO alpha-2 → ISO alpha-3 mapping for African countries (for Plotly choropleth)
 ISO2_TO_ISO3 = {
@@ -20,6 +37,47 @@ ISO2_TO_ISO3 = {
     "ZA": "ZAF", "SS": "SSD", "SD": "SDN", "TZ": "TZA", "TG": "TGO",
     "TN": "TUN", "UG": "UGA", "ZM": "ZMB", "ZW": "ZWE", "RE": "REU",
 }
+# Countries whose developers count as African-led; Réunion is on the map but,
+# as a French overseas region, not an African origin. (The Gap Analysis page's
+# former hand-written list also left out Ghana, by mistake: it is included)
+AFRICAN_ISO2 = frozenset(ISO2_TO_ISO3) - {"RE"}
+
+# Study flags that make up a country's African feature ratio
+AFRICAN_FEATURES = ("informal_economy", "biomass_charcoal", "power_reliability", "urbanization")
+# yes/no technology flags on each study
+TECH_COLUMNS = ("solar", "wind", "hydro", "biomass", "nuclear", "geothermal", "fossil", "h2", "coal")
+# Study columns the Browse Studies sidebar can filter on
+STUDY_FILTER_COLUMNS = (
+    "year", "scale", "approach", "method", "frequency", "open_source",
+    *AFRICAN_FEATURES, "sdg_7", "sdg_13", "ndc_mention", "local_ownership", *TECH_COLUMNS,
+)
+
+# Long free-text study columns no chart or filter reads. They are parsed,
+# cached and loaded separately from the rest, only when something asks for them
+STUDY_TEXT_COLUMNS = ("study_objective", "link", "contact", "institutional_users")
+
+# Columns derived from studies.csv at ingest (see derive_study_columns)
+ORIGIN_CATEGORIES = ("African-led", "Mixed", "Non-African")
+POOL_PREFIX = "pool_"
+DERIVED_STUDY_COLUMNS = ("origin_category", "tech_mask")
+
+# Typed schema applied (and validated) when a CSV is parsed: yes/no flags
+# become booleans, enumerations categoricals (declared levels are checked,
+# and a blank is missing) and years nullable integers. ``as_raw`` turns a
+# frame back into the CSV's strings
+YES_NO = ("no", "yes")
+LEVELS = ("no", "partial", "yes")
+STUDY_FLAGS = (*TECH_COLUMNS, "sdg_7", "sdg_13", "ndc_mention", "informal_economy")
+STUDY_CATEGORIES = {
+    "scale": None, "approach": None, "method": None, "sector": None, "open_source": None, "frequency": None,
+    "biomass_charcoal": LEVELS, "power_reliability": LEVELS, "urbanization": LEVELS, "local_ownership": LEVELS,
+}
+STUDY_YEARS = ("year", "time_horizon_start", "time_horizon_end")
+COUNTRY_FLAGS = ("has_ndc", "has_lts")
+COUNTRY_CATEGORIES = {
+    "region": None, "power_pool": None, "language": None,
+    "has_institutional_capacity": LEVELS, "data_availability": ("poor", "moderate", "good"),
+}
 
 
 @pd.api.extensions.register_dataframe_accessor("_")
@@ -27,9 +85,140 @@ class _Dummy:
     pass
 
 
-def load_countries() -> pd.DataFrame:
+_versions: dict[Path, tuple[int, int, str]] = {}
+
+
+def file_version(path: Path) -> str:
+    """
+    Short content hash of ``path``. The hash is memoized on (mtime, size), so
+    callers can ask on every rerun and only pay for a stat() until the file
+    is actually edited.
+    """
+    stat = path.stat()
+    memo = _versions.get(path)
+    if memo is None or memo[:2] != (stat.st_mtime_ns, stat.st_size):
+        digest = hashlib.blake2b(path.read_bytes(), digest_size=8).hexdigest()
+        memo = _versions[path] = (stat.st_mtime_ns, stat.st_size, digest)
+    return memo[2]
+
+
+def data_versions() -> dict[str, str]:
+    """Content version of every source CSV, keyed by file name."""
+    return {name: file_version(BASE / name) for name in SOURCES}
+
+
+def _read_cache(cache: Path) -> pd.DataFrame | None:
+    if cache.exists():
+        try:
+            return pd.read_parquet(cache, memory_map=True)
+        except Exception:
+            pass  # partial or unreadable cache file: rebuild
+    return None
+
+
+def _load_cached(
+    filename: str,
+    parse: Callable[[Path], pd.DataFrame],
+    part: str | None = None,
+    version: str | None = None,
+) -> pd.DataFrame:
+    """
+    Return the cleaned frame for ``data/<filename>``, read from the binary
+    cache when the CSV is unchanged and re-parsed (and re-cached) otherwise.
+    A ``part`` (a column group of the file) is cached under its own name.
+    A ``version`` asks for that content version of the file: its cache is
+    used even if the CSV has been edited since, and the current file only
+    when that cache is gone.
+    """
+    src = BASE / filename
+    stem = f"{src.stem}-{part}" if part else src.stem
+    current = file_version(src)
+    if version not in (None, current):
+        df = _read_cache(CACHE_DIR / f"{stem}-v{CACHE_VERSION}-{version}.parquet")
+        if df is not None:
+            return df
+        log.warning("%s changed since version %s; reading the current file", filename, version)
+    cache = CACHE_DIR / f"{stem}-v{CACHE_VERSION}-{current}.parquet"
+    df = _read_cache(cache)
+    if df is not None:
+        return df
+    df = parse(src)
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        tmp = cache.with_name(f"{cache.name}.{os.getpid()}.tmp")
+        df.to_parquet(tmp)
+        tmp.replace(cache)
+        for stale in CACHE_DIR.glob(f"{stem}-v*.parquet"):
+            if stale != cache:
+                stale.unlink(missing_ok=True)
+    except (ImportError, OSError, ValueError):
+        pass  # no pyarrow or read-only deployment: serve straight from the CSV
+    return df
+
+
+def _warn_invalid(column: str, values: pd.Series, bad: pd.Series, expected):
+    if bad.any():
+        found = sorted(set(values[bad].astype(str)))[:5]
+        log.warning(
+            "Column %r has %d unexpected values %s (expected %s); read as missing",
+            column, int(bad.sum()), found, list(expected),
+        )
+
+
+def _flag(column: str, values: pd.Series) -> pd.arrays.BooleanArray:
+    text = values.astype(str).str.strip().str.lower()
+    _warn_invalid(column, values, ~(text.isin(YES_NO) | text.eq("")), YES_NO)
+    return pd.array(text.eq("yes").where(text.isin(YES_NO)), dtype="boolean")
+
+
+def _category(column: str, values: pd.Series, levels=None) -> pd.Categorical:
+    if levels is None:
+        return pd.Categorical(values.astype(str))
+    text = values.astype(str).str.strip()
+    _warn_invalid(column, values, ~(text.isin(levels) | text.eq("")), levels)
+    return pd.Categorical(text.where(text.ne("")), categories=levels, ordered=True)
+
+
+def _year(column: str, values: pd.Series) -> pd.arrays.IntegerArray:
+    text = values.astype(str).str.strip().str.split(".").str[0]
+    years = pd.to_numeric(text.where(text.ne("")), errors="coerce")
+    _warn_invalid(column, values, years.isna() & text.ne(""), ["a year"])
+    return pd.array(years, dtype="Int16")
+
+
+def compact_dtypes(df: pd.DataFrame, flags=(), categories: dict | None = None, years=()) -> pd.DataFrame:
+    """
+    Convert ``df``'s string columns to the schema's types: nullable
+    booleans, categoricals and ``Int16`` years. Blanks, and values the
+    schema does not allow (logged as a warning), are read as missing, so
+    one bad cell never stops the file loading. Columns missing from ``df``
+    are skipped.
+    """
+    converted = {c: _flag(c, df[c]) for c in flags if c in df.columns}
+    converted |= {c: _category(c, df[c], levels) for c, levels in (categories or {}).items() if c in df.columns}
+    converted |= {c: _year(c, df[c]) for c in years if c in df.columns}
+    return df.assign(**converted)
+
+
+def as_raw(df: pd.DataFrame, years: bool = True) -> pd.DataFrame:
+    """
+    ``df`` with typed schema columns turned back into the source CSV's
+    strings; ``years=False`` keeps year columns as integers, for display.
+    """
+    raw = {}
+    for c in df.columns:
+        values = df[c]
+        if c in STUDY_FLAGS or c in COUNTRY_FLAGS:
+            flags = np.where(values.to_numpy(dtype=bool, na_value=False), "yes", "no")
+            raw[c] = np.where(values.isna().to_numpy(), "", flags)
+        elif (years and c in STUDY_YEARS) or c in STUDY_CATEGORIES or c in COUNTRY_CATEGORIES:
+            raw[c] = values.astype(object).where(values.notna(), "").astype(str)
+    return df.assign(**raw)
+
+
+def _parse_countries(path: Path) -> pd.DataFrame:
     df = pd.read_csv(
-        BASE / "countries.csv",
+        path,
         sep=";",
         encoding="latin-1",
         keep_default_na=False,
@@ -39,28 +228,111 @@ def load_countries() -> pd.DataFrame:
         df["electrification_rate"].astype(str).str.replace(",", ".").astype(float)
     )
     df["iso3"] = df["iso_code"].map(ISO2_TO_ISO3)
-    return df
+    return compact_dtypes(df, COUNTRY_FLAGS, COUNTRY_CATEGORIES)
 
 
-def load_studies() -> pd.DataFrame:
+def _read_studies(path: Path, usecols: Callable[[str], bool]) -> pd.DataFrame:
     df = pd.read_csv(
-        BASE / "studies.csv",
+        path,
         sep=";",
         encoding="latin-1",
         keep_default_na=False,
+        usecols=usecols,
     )
     # Drop unnamed columns
     df = df.loc[:, ~df.columns.str.startswith("Unnamed")]
     # Drop empty rows
     df = df[df["id"].astype(str).str.strip() != ""]
     df["id"] = df["id"].astype(str).str.split(".").str[0].astype(int)
-    df["year"] = pd.to_numeric(df["year"].astype(str).str.split(".").str[0], errors="coerce")
     return df
 
 
-def load_tools() -> pd.DataFrame:
+def _parse_studies(path: Path) -> pd.DataFrame:
+    df = _read_studies(path, lambda c: c not in STUDY_TEXT_COLUMNS)
+    df = compact_dtypes(df, STUDY_FLAGS, STUDY_CATEGORIES, STUDY_YEARS)
+    return derive_study_columns(df)
+
+
+def _parse_study_columns(path: Path) -> pd.DataFrame:
+    # studies.csv's header, text columns included, one row per column
+    header = pd.read_csv(path, sep=";", encoding="latin-1", nrows=0).columns
+    return pd.DataFrame({"column": [c for c in header if not c.startswith("Unnamed")]})
+
+
+def _parse_study_text(path: Path) -> pd.DataFrame:
+    # Text columns only, keyed on the study id
+    return _read_studies(path, lambda c: c == "id" or c in STUDY_TEXT_COLUMNS).set_index("id")
+
+
+def classify_origins(developer_origin: pd.Series) -> pd.Categorical:
+    """
+    African-led / Mixed / Non-African from comma- or semicolon-separated
+    developer country codes; blanks count as Non-African.
+    """
+    codes = (
+        developer_origin.astype(str).str.replace(";", ",").str.split(",").explode()
+        .str.strip().str[:2].str.upper()
+    )
+    codes = codes[codes.ne("")]
+    african = codes.isin(AFRICAN_ISO2).groupby(level=0)
+    has_african = african.any().reindex(developer_origin.index, fill_value=False)
+    all_african = african.all().reindex(developer_origin.index, fill_value=False)
+    category = np.where(all_african, "African-led", np.where(has_african, "Mixed", "Non-African"))
+    return pd.Categorical(category, categories=ORIGIN_CATEGORIES)
+
+
+def tech_mask(studies: pd.DataFrame) -> np.ndarray:
+    """Technologies of each study packed into one integer: bit i is ``TECH_COLUMNS[i]``."""
+    mask = np.zeros(len(studies), dtype=np.uint16)
+    for bit, tech in enumerate(TECH_COLUMNS):
+        if tech in studies.columns:
+            mask |= studies[tech].to_numpy(dtype=np.uint16, na_value=0) << bit
+    return mask
+
+
+def derive_study_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the per-study fields pages would otherwise recompute on every rerun:
+    ``origin_category``, one boolean ``pool_<POOL>`` column per power pool
+    and the ``tech_mask`` technology bitmask. Runs once per studies.csv
+    version, as part of parsing, so the columns land in the binary cache.
+    """
+    pools = df["power_pool"].astype(str).str.replace(" ", "").str.get_dummies(sep=",")
+    pools = pools.drop(columns=["none"], errors="ignore").astype(bool).add_prefix(POOL_PREFIX)
+    return df.assign(
+        origin_category=classify_origins(df["developer_origin"]),
+        tech_mask=tech_mask(df),
+        **pools.reindex(df.index, fill_value=False),
+    )
+
+
+def is_yes(df: pd.DataFrame) -> pd.DataFrame:
+    """Per column of ``df``: the boolean flag itself (missing as ``False``), or whether a level column is ``"yes"``."""
+    return pd.DataFrame(
+        {
+            c: df[c].to_numpy(dtype=bool, na_value=False) if pd.api.types.is_bool_dtype(df[c]) else df[c].eq("yes")
+            for c in df.columns
+        },
+        index=df.index,
+    )
+
+
+def source_columns(studies: pd.DataFrame) -> list[str]:
+    """The studies.csv columns of ``studies``, without those added by :func:`derive_study_columns`."""
+    return [c for c in studies.columns if c not in DERIVED_STUDY_COLUMNS and not c.startswith(POOL_PREFIX)]
+
+
+def tech_coverage(studies: pd.DataFrame) -> pd.Series:
+    """Share of ``studies`` (0–1) covering each technology, read from ``tech_mask``."""
+    mask = studies["tech_mask"].to_numpy(dtype=np.uint16)
+    bits = (mask[:, None] >> np.arange(len(TECH_COLUMNS), dtype=np.uint16)) & 1
+    share = bits.mean(axis=0) if len(mask) else np.zeros(len(TECH_COLUMNS))
+    return pd.Series(share, index=list(TECH_COLUMNS), name="coverage")
+
+
+def _parse_tools(path: Path) -> pd.DataFrame:
     df = pd.read_csv(
-        BASE / "tools.csv",
+        path,
         sep=";",
         encoding="latin-1",
         keep_default_na=False,
@@ -72,23 +344,102 @@ def load_tools() -> pd.DataFrame:
     return df
 
 
-def load_power_pools() -> pd.DataFrame:
+def _parse_power_pools(path: Path) -> pd.DataFrame:
     return pd.read_csv(
-        BASE / "power_pools.csv",
+        path,
         sep=";",
         encoding="latin-1",
         keep_default_na=False,
     )
 
 
-def get_country_studies(studies: pd.DataFrame, iso: str) -> pd.DataFrame:
+def load_countries(raw: bool = False) -> pd.DataFrame:
+    """Countries with typed columns, or with the CSV's strings when ``raw``."""
+    df = _load_cached("countries.csv", _parse_countries)
+    return as_raw(df) if raw else df
+
+
+def load_studies(raw: bool = False, text: bool = False) -> pd.DataFrame:
+    """
+    Studies with typed and derived columns, or just the CSV's columns and
+    strings when ``raw``. The ``STUDY_TEXT_COLUMNS`` are only read with ``text``.
+    """
+    df = _load_cached("studies.csv", _parse_studies)
+    if text:
+        df = with_study_text(df, load_study_text(), study_columns())
+    return as_raw(df[source_columns(df)]) if raw else df
+
+
+def study_columns(version: str | None = None) -> list[str]:
+    """
+    studies.csv's column order, text columns included. Cached like the
+    parsed frames, so ``version`` (a content hash) gets that version's.
+    """
+    return _load_cached("studies.csv", _parse_study_columns, part="columns", version=version)["column"].tolist()
+
+
+def load_study_text(version: str | None = None) -> pd.DataFrame:
+    """
+    The ``STUDY_TEXT_COLUMNS`` alone, indexed by study ``id``. ``version`` (a
+    studies.csv content hash) asks for the text of that version of the file.
+    """
+    return _load_cached("studies.csv", _parse_study_text, part="text", version=version)
+
+
+def with_study_text(studies: pd.DataFrame, text: pd.DataFrame, columns) -> pd.DataFrame:
+    """
+    ``studies`` joined with ``text`` on ``id``: the source ``columns`` in
+    studies.csv's order, then derived ones.
+    """
+    df = studies.join(text, on="id")
+    return df[[c for c in columns if c in df.columns] + [c for c in df.columns if c not in columns]]
+
+
+def load_tools() -> pd.DataFrame:
+    return _load_cached("tools.csv", _parse_tools)
+
+
+def load_power_pools() -> pd.DataFrame:
+    return _load_cached("power_pools.csv", _parse_power_pools)
+
+
+def build_country_index(studies: pd.DataFrame) -> pd.DataFrame:
+    """
+    Boolean study × country incidence matrix, parsed once from ``countries``.
+    Rows share the studies index (so filtered subsets can be looked up with
+    ``index.loc[subset.index]``); columns are the ISO-2 codes that occur.
+    """
+    # Same tokens a \bISO\b regex would match, for every code at once
+    codes = studies["countries"].astype(str).str.findall(r"\b[A-Z]{2}\b").explode().dropna()
+    if codes.empty:
+        return pd.DataFrame(index=studies.index, dtype=bool)
+    index = pd.crosstab(codes.index, codes.to_numpy()).gt(0)
+    index.index.name = None
+    index.columns.name = None
+    return index.reindex(studies.index, fill_value=False)
+
+
+def build_pool_index(studies: pd.DataFrame) -> pd.DataFrame:
+    """Boolean study × power pool membership, from the ``pool_<POOL>`` columns."""
+    pools = studies[[c for c in studies.columns if c.startswith(POOL_PREFIX)]]
+    return pools.rename(columns=lambda c: c[len(POOL_PREFIX):])
+
+
+def country_mask(studies: pd.DataFrame, iso: str, index: pd.DataFrame | None = None) -> pd.Series:
+    """Boolean mask over ``studies`` rows that cover ``iso``."""
+    if index is None:
+        index = build_country_index(studies)
+    if iso not in index.columns:
+        return pd.Series(False, index=studies.index)
+    return index[iso].reindex(studies.index, fill_value=False)
+
+
+def get_country_studies(studies: pd.DataFrame, iso: str, index: pd.DataFrame | None = None) -> pd.DataFrame:
     """Return studies that cover a given ISO-2 country code."""
-    pattern = r"\b" + re.escape(iso) + r"\b"
-    mask = studies["countries"].str.contains(pattern, regex=True, na=False)
-    return studies[mask].copy()
+    return studies[country_mask(studies, iso, index)]
 
 
-def compute_gap_score(row) -> float:
+def compute_gap_score(row, weights: GapWeights = GAP_WEIGHTS) -> float:
     """
     Gap score 0–100, higher = more under-served.
     Components:
@@ -96,49 +447,42 @@ def compute_gap_score(row) -> float:
       - Institutional capacity (30%)
       - Data availability (20%)
       - Model density (10%)
+    Single-row wrapper around :func:`utils.scoring.gap_scores`.
     """
-    cap_map = {"yes": 2, "partial": 1, "no": 0}
-    dat_map = {"good": 2, "moderate": 1, "poor": 0}
-    feat = row.get("feature_ratio", 0)
-    cap = cap_map.get(str(row.get("has_institutional_capacity", "no")), 0)
-    dat = dat_map.get(str(row.get("data_availability", "poor")), 0)
-    n = min(row.get("nb_models_applied", 0), 10)
-    return round(
-        (1 - feat) * 40
-        + (1 - cap / 2) * 30
-        + (1 - dat / 2) * 20
-        + (1 - n / 10) * 10
-    )
+    return int(gap_scores(
+        [row.get("feature_ratio", 0)],
+        [row.get("has_institutional_capacity", "no")],
+        [row.get("data_availability", "poor")],
+        [row.get("nb_models_applied", 0)],
+        weights,
+    )[0])
 
 
-def compute_readiness(row) -> float:
-    cap_pts = {"yes": 3, "partial": 1.5, "no": 0}.get(str(row.get("has_institutional_capacity", "no")), 0)
-    dat_pts = {"good": 3, "moderate": 1.5, "poor": 0}.get(str(row.get("data_availability", "poor")), 0)
-    ndc_pt = 1 if str(row.get("has_ndc", "no")) == "yes" else 0
-    lts_pt = 1 if str(row.get("has_lts", "no")) == "yes" else 0
-    elec_pts = min(float(row.get("electrification_rate", 0)) / 100 * 2, 2)
-    return round(cap_pts + dat_pts + ndc_pt + lts_pt + elec_pts, 1)
+def compute_readiness(row, weights: ReadinessWeights = READINESS_WEIGHTS) -> float:
+    """Single-row wrapper around :func:`utils.scoring.readiness_scores`."""
+    return float(readiness_scores(
+        [row.get("has_institutional_capacity", "no")],
+        [row.get("data_availability", "poor")],
+        [row.get("has_ndc", "no")],
+        [row.get("has_lts", "no")],
+        [row.get("electrification_rate", 0)],
+        weights,
+    )[0])
 
 
-def enrich_countries(countries: pd.DataFrame, studies: pd.DataFrame) -> pd.DataFrame:
+def enrich_countries(
+    countries: pd.DataFrame, studies: pd.DataFrame, index: pd.DataFrame | None = None
+) -> pd.DataFrame:
     """Add gap score, readiness, and African feature ratios to countries dataframe."""
-    rows = []
-    for _, c in countries.iterrows():
-        iso = c["iso_code"]
-        cs = get_country_studies(studies, iso)
-        n = len(cs)
-        feats = 0
-        if n > 0:
-            feats = sum([
-                cs["informal_economy"].eq("yes").any(),
-                cs["biomass_charcoal"].eq("yes").any(),
-                cs["power_reliability"].eq("yes").any(),
-                cs["urbanization"].eq("yes").any(),
-            ]) / 4
-        row = c.to_dict()
-        row["n_studies_actual"] = n
-        row["feature_ratio"] = feats
-        row["gap_score"] = compute_gap_score({**row})
-        row["readiness_score"] = compute_readiness(row)
-        rows.append(row)
-    return pd.DataFrame(rows)
+    if index is None:
+        index = build_country_index(studies)
+    isos = countries["iso_code"].tolist()
+    # study × country incidence, aligned on the countries' row order
+    inc = index.reindex(index=studies.index, columns=isos, fill_value=False).to_numpy(dtype=np.int64)
+    feats = is_yes(studies[list(AFRICAN_FEATURES)]).to_numpy(dtype=np.int64)
+
+    out = countries.reset_index(drop=True)
+    out["n_studies_actual"] = inc.sum(axis=0)
+    # A country has a feature if any covering study has it
+    out["feature_ratio"] = ((inc.T @ feats) > 0).sum(axis=1) / len(AFRICAN_FEATURES)
+    return score_countries(out)
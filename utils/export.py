@@ -0,0 +1,104 @@
+"""Chunked export of study selections to CSV, Parquet or Excel."""
+
+import tempfile
+from importlib.util import find_spec
+
+import numpy as np
+import pandas as pd
+
+from utils.data import as_raw
+
+# Rows converted and written per step, bounding the extra memory an export uses
+CHUNK_ROWS = 500
+
+# Format label → (file extension, MIME type, module it needs)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv", None),
+    "Parquet": ("parquet", "application/vnd.apache.parquet", "pyarrow"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "openpyxl"),
+}
+
+
+def available_formats() -> list[str]:
+    """Export formats whose writer library is installed."""
+    return [label for label, (_, _, module) in EXPORT_FORMATS.items() if module is None or find_spec(module)]
+
+
+def _part(df: pd.DataFrame, positions: np.ndarray, text: pd.DataFrame | None, columns) -> pd.DataFrame:
+    part = df.iloc[positions]
+    if text is not None:
+        part = part.join(text, on="id")
+    return as_raw(part if columns is None else part[list(columns)])
+
+
+def _chunks(df: pd.DataFrame, positions: np.ndarray, text: pd.DataFrame | None, columns):
+    for start in range(0, len(positions), CHUNK_ROWS):
+        yield _part(df, positions[start:start + CHUNK_ROWS], text, columns)
+
+
+def _write_csv(f, header, chunks):
+    header.to_csv(f, mode="wb", index=False, encoding="utf-8")
+    for chunk in chunks:
+        chunk.to_csv(f, mode="wb", header=False, index=False, encoding="utf-8")
+
+
+def _write_parquet(f, header, chunks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # One schema from the full frame's dtypes, so every chunk (and an empty
+    # selection) is written with the same column types
+    schema = pa.Schema.from_pandas(header, preserve_index=False)
+    with pq.ParquetWriter(f, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _write_excel(f, header, chunks, sheet):
+    from openpyxl import Workbook
+
+    # Write-only mode streams rows to the file instead of keeping a sheet model
+    book = Workbook(write_only=True)
+    ws = book.create_sheet(sheet[:31])
+    ws.append(list(header.columns))
+    for chunk in chunks:
+        for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False):
+            ws.append(list(row))
+    book.save(f)
+
+
+def export_rows(
+    df: pd.DataFrame,
+    rows,
+    fmt: str,
+    sheet: str = "studies",
+    text: pd.DataFrame | None = None,
+    columns=None,
+) -> bytes:
+    """
+    Export the rows of ``df`` labelled ``rows`` (in that order) as ``fmt``
+    (a key of ``EXPORT_FORMATS``), with every column or just ``columns``,
+    in that order. ``text`` (indexed by study id) is joined onto the rows
+    on ``df["id"]``. Typed columns are written back as the source CSV's
+    strings (see :func:`utils.data.as_raw`).
+
+    Rows are taken from ``df``, joined with ``text`` and converted
+    ``CHUNK_ROWS`` at a time into a temporary file, so neither a joined nor
+    a formatted copy of the whole selection is ever held in memory; only
+    the finished file is read back.
+    """
+    positions = df.index.get_indexer(pd.Index(rows))
+    positions = positions[positions >= 0]
+    header = _part(df, positions[:0], text, columns)
+    chunks = _chunks(df, positions, text, columns)
+    with tempfile.TemporaryFile() as f:
+        if fmt == "CSV":
+            _write_csv(f, header, chunks)
+        elif fmt == "Parquet":
+            _write_parquet(f, header, chunks)
+        elif fmt == "Excel":
+            _write_excel(f, header, chunks, sheet)
+        else:
+            raise ValueError(f"Unknown export format: {fmt!r}")
+        f.seek(0)
+        return f.read()
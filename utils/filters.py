@@ -0,0 +1,95 @@
+"""Packed-bitmap filter index for the studies inventory."""
+
+import numpy as np
+import pandas as pd
+
+# Set bits per byte value, for counting matches without unpacking
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class BitmapIndex:
+    """
+    One packed bitset per (column, value) over the rows of a frame.
+
+    A filter combination evaluates as bitwise OR within a column and AND
+    across columns on the packed bitsets; rows are only materialised once,
+    from the final bitset.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns):
+        self.n = len(df)
+        self.columns = tuple(c for c in columns if c in df.columns)
+        self.bitmaps: dict[tuple, np.ndarray] = {}
+        # Per column: its sorted values and their bitmaps stacked row-wise
+        self._stacks: dict[str, tuple[list, np.ndarray]] = {}
+        self._all = np.packbits(np.ones(self.n, dtype=bool))
+        self._none = np.zeros_like(self._all)
+        for col in self.columns:
+            codes, uniques = pd.factorize(df[col], sort=True)
+            values = uniques.tolist()
+            stack = np.packbits(codes[None, :] == np.arange(len(values))[:, None], axis=1)
+            self._stacks[col] = (values, stack)
+            for value, bitmap in zip(values, stack):
+                self.bitmaps[(col, value)] = bitmap
+
+    def values(self, column: str) -> list:
+        """Distinct indexed values of ``column``, sorted."""
+        return list(self._stacks[column][0]) if column in self._stacks else []
+
+    def any_of(self, column: str, values) -> np.ndarray:
+        """Rows whose ``column`` is any of ``values``."""
+        bits = self._none
+        for v in values:
+            bitmap = self.bitmaps.get((column, v))
+            if bitmap is not None:
+                bits = bits | bitmap
+        return bits
+
+    def select(self, filters: dict) -> np.ndarray:
+        """
+        AND across columns of the OR within each column's value list. Empty or
+        ``None`` value lists, and columns that are not indexed, leave the rows
+        unfiltered on that column.
+        """
+        bits = self._all
+        for column, values in filters.items():
+            if values is None or len(values) == 0 or column not in self.columns:
+                continue
+            bits = bits & self.any_of(column, values)
+        return bits
+
+    def facet_counts(self, filters: dict, columns=None) -> dict[str, dict]:
+        """
+        For every value of every column in ``columns`` (default: all indexed
+        columns), the number of rows that match ``filters`` with that column's
+        own filter replaced by the value. Filters combine as in :meth:`select`.
+        """
+        active = [
+            (col, self.any_of(col, values)) for col, values in filters.items()
+            if values is not None and len(values) > 0 and col in self.columns
+        ]
+        # prefix[i] / suffix[i] AND the filters before / from position i, so
+        # "everything except filter i" costs one AND per active column
+        prefix, suffix = [self._all], [self._all]
+        for _, bits in active:
+            prefix.append(prefix[-1] & bits)
+        for _, bits in reversed(active):
+            suffix.append(suffix[-1] & bits)
+        suffix.reverse()
+        others = {col: prefix[i] & suffix[i + 1] for i, (col, _) in enumerate(active)}
+
+        counts = {}
+        for col in columns or self.columns:
+            if col not in self._stacks:
+                continue
+            values, stack = self._stacks[col]
+            hits = _POPCOUNT[stack & others.get(col, prefix[-1])].sum(axis=1)
+            counts[col] = dict(zip(values, hits.tolist()))
+        return counts
+
+    def mask(self, bits: np.ndarray) -> np.ndarray:
+        """Boolean row mask for a packed bitset."""
+        return np.unpackbits(bits, count=self.n).astype(bool)
+
+    def count(self, bits: np.ndarray) -> int:
+        return int(_POPCOUNT[bits].sum())
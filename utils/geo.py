@@ -0,0 +1,277 @@
+"""Bundled Africa country geometry, simplified and dissolved once per process."""
+
+import json
+import sys
+from collections import Counter, defaultdict
+from functools import cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.data import ISO2_TO_ISO3, load_countries
+
+# Country polygons (GeoJSON FeatureCollection) shipped with the app: Natural
+# Earth 1:110m admin-0 countries (public domain), see the README. Features are
+# matched to our countries by ISO3 (ISO_A3 / ADM0_A3 / id) or ISO2 property.
+# Exterior rings wind clockwise, as plotly (d3-geo) expects
+GEOMETRY_PATH = Path(__file__).parent.parent / "assets" / "africa.geojson"
+
+# Douglas-Peucker tolerance per detail level, in degrees
+SIMPLIFICATION = {"full": 0.0, "medium": 0.02, "low": 0.1}
+DEFAULT_DETAIL = "medium"
+COORD_DECIMALS = 4
+
+AFRICA_ISO3 = frozenset(ISO2_TO_ISO3.values())
+
+
+def _iso3(feature: dict) -> str | None:
+    props = feature.get("properties") or {}
+    for key in ("ISO_A3", "iso_a3", "ADM0_A3", "adm0_a3"):
+        if props.get(key) in AFRICA_ISO3:
+            return props[key]
+    if feature.get("id") in AFRICA_ISO3:
+        return feature["id"]
+    for key in ("ISO_A2", "iso_a2"):
+        if props.get(key) in ISO2_TO_ISO3:
+            return ISO2_TO_ISO3[props[key]]
+    return None
+
+
+def _polygons(geometry: dict) -> list:
+    """A Polygon / MultiPolygon geometry as a list of polygons (lists of rings)."""
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return list(geometry["coordinates"])
+    return []
+
+
+def _feature(id_: str, polygons: list) -> dict:
+    return {"type": "Feature", "id": id_, "properties": {},
+            "geometry": {"type": "MultiPolygon", "coordinates": polygons}}
+
+
+@cache
+def _source() -> dict[str, list] | None:
+    """ISO3 → full-resolution polygons from the bundled file, or ``None`` if it is absent."""
+    if not GEOMETRY_PATH.exists():
+        return None
+    with open(GEOMETRY_PATH, encoding="utf-8") as f:
+        collection = json.load(f)
+    shapes = defaultdict(list)
+    for feature in collection.get("features", []):
+        iso3 = _iso3(feature)
+        if iso3 and feature.get("geometry"):
+            shapes[iso3] += _polygons(feature["geometry"])
+    return dict(shapes)
+
+
+def simplify_ring(ring, tolerance: float) -> list | None:
+    """
+    Douglas-Peucker simplification of a closed ring. Returns ``None`` when
+    fewer than four points survive, i.e. the ring vanishes at this detail.
+    """
+    pts = np.asarray(ring, dtype=float)[:, :2]
+    if tolerance > 0 and len(pts) > 4:
+        keep = np.zeros(len(pts), dtype=bool)
+        keep[[0, -1]] = True
+        stack = [(0, len(pts) - 1)]
+        while stack:
+            a, b = stack.pop()
+            if b <= a + 1:
+                continue
+            seg, rel = pts[b] - pts[a], pts[a + 1:b] - pts[a]
+            norm = np.hypot(*seg)
+            # For the closing segment of a ring (a == b) fall back to plain distance
+            dist = (np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / norm if norm
+                    else np.hypot(rel[:, 0], rel[:, 1]))
+            i = int(dist.argmax())
+            if dist[i] > tolerance:
+                keep[a + 1 + i] = True
+                stack += [(a, a + 1 + i), (a + 1 + i, b)]
+        pts = pts[keep]
+    if len(pts) < 4:
+        return None
+    return pts.round(COORD_DECIMALS).tolist()
+
+
+def _simplify(polygons: list, tolerance: float) -> list:
+    out = []
+    for rings in polygons:
+        exterior = simplify_ring(rings[0], tolerance)
+        if exterior is None:
+            continue
+        holes = [r for r in (simplify_ring(h, tolerance) for h in rings[1:]) if r is not None]
+        out.append([exterior, *holes])
+    return out
+
+
+def _dissolve(polygons: list) -> list:
+    """
+    Boundary rings of the union of ``polygons``: edges shared by two of them
+    cancel out, the rest are chained back into closed rings. Relies on
+    neighbours sharing exact border vertices, so it runs before simplifying.
+    """
+    edges = Counter()
+    for rings in polygons:
+        for ring in rings:
+            pts = [tuple(p[:2]) for p in ring]
+            for a, b in zip(pts, pts[1:]):
+                if a != b:
+                    edges[(a, b)] += 1
+    outer = defaultdict(list)
+    for (a, b), n in edges.items():
+        if n - edges.get((b, a), 0) > 0:
+            outer[a].append(b)
+    rings = []
+    while outer:
+        start = next(iter(outer))
+        ring, point = [start], start
+        while True:
+            nxt = outer[point].pop()
+            if not outer[point]:
+                del outer[point]
+            ring.append(nxt)
+            point = nxt
+            if point == start or point not in outer:
+                break
+        if len(ring) >= 4 and ring[0] == ring[-1]:
+            rings.append([list(p) for p in ring])
+    return [[ring] for ring in rings]
+
+
+@cache
+def country_geometry(detail: str = DEFAULT_DETAIL) -> dict | None:
+    """
+    FeatureCollection of our countries at ``detail`` (see ``SIMPLIFICATION``),
+    with each feature's ``id`` its ISO3 code; ``None`` without bundled geometry.
+    """
+    shapes = _source()
+    if shapes is None:
+        return None
+    tolerance = SIMPLIFICATION[detail]
+    return {"type": "FeatureCollection",
+            "features": [_feature(iso3, _simplify(p, tolerance)) for iso3, p in shapes.items()]}
+
+
+@cache
+def group_geometry(groups: tuple[tuple[str, str], ...], detail: str = DEFAULT_DETAIL) -> dict | None:
+    """
+    Dissolved polygons of country groups (regions, power pools...), from
+    ``(iso3, group)`` pairs; each feature's ``id`` is the group name.
+    """
+    shapes = _source()
+    if shapes is None:
+        return None
+    members = defaultdict(list)
+    for iso3, group in groups:
+        members[group] += shapes.get(iso3, [])
+    tolerance = SIMPLIFICATION[detail]
+    return {"type": "FeatureCollection", "features": [
+        _feature(str(group), _simplify(_dissolve(polygons), tolerance))
+        for group, polygons in members.items() if polygons
+    ]}
+
+
+def subset(collection: dict, ids) -> dict:
+    """The features of ``collection`` whose ``id`` is in ``ids``."""
+    ids = set(ids)
+    return {"type": "FeatureCollection", "features": [f for f in collection["features"] if f["id"] in ids]}
+
+
+# ── Checks ─────────────────────────────────────────────────────────────────────
+
+# Largest relative difference between a dissolved group's area and the sum of
+# its members' areas (both at full detail)
+DISSOLVE_AREA_TOLERANCE = 1e-6
+
+
+def ring_area(ring) -> float:
+    """Signed planar area of a closed ring in square degrees; clockwise is negative."""
+    pts = np.asarray(ring, dtype=float)
+    x, y = pts[:, 0], pts[:, 1]
+    return 0.5 * float(np.sum(x[:-1] * y[1:] - x[1:] * y[:-1]))
+
+
+def _area(polygons: list) -> float:
+    return sum(ring_area(ring) for rings in polygons for ring in rings)
+
+
+def check_collection(collection: dict) -> list[str]:
+    """
+    Problems with a FeatureCollection of our polygons: unclosed or
+    degenerate rings, non-finite coordinates, and exteriors / holes wound
+    the wrong way round.
+    """
+    problems = []
+    for feature in collection["features"]:
+        polygons = feature["geometry"]["coordinates"]
+        if not polygons:
+            problems.append(f"{feature['id']}: no polygons")
+        for rings in polygons:
+            for i, ring in enumerate(rings):
+                pts = np.asarray(ring, dtype=float)
+                where = f"{feature['id']} ring of {len(ring)} points"
+                if len(pts) < 4 or not np.array_equal(pts[0], pts[-1]):
+                    problems.append(f"{where}: not a closed ring")
+                elif not np.isfinite(pts).all():
+                    problems.append(f"{where}: non-finite coordinates")
+                elif (ring_area(ring) < 0) != (i == 0):
+                    problems.append(f"{where}: {'exterior' if i == 0 else 'hole'} wound the wrong way")
+    return problems
+
+
+def check_geometry(groups: dict[str, tuple[tuple[str, str], ...]]) -> list[str]:
+    """
+    Check the bundled geometry at every detail level, and that dissolving
+    each grouping in ``groups`` (name → ``(iso3, group)`` pairs) keeps the
+    members' total area while merging away their shared borders.
+    """
+    shapes = _source()
+    if shapes is None:
+        return [f"{GEOMETRY_PATH} is missing"]
+    problems = [f"unknown feature {iso3}" for iso3 in shapes if iso3 not in AFRICA_ISO3]
+    for detail in SIMPLIFICATION:
+        problems += [f"{detail}: {p}" for p in check_collection(country_geometry(detail))]
+    for name, pairs in groups.items():
+        for detail in SIMPLIFICATION:
+            problems += [f"{name} ({detail}): {p}" for p in check_collection(group_geometry(pairs, detail))]
+        members = defaultdict(list)
+        for iso3, group in pairs:
+            members[group] += shapes.get(iso3, [])
+        for feature in group_geometry(pairs, "full")["features"]:
+            edges = {
+                (tuple(a), tuple(b)) for rings in feature["geometry"]["coordinates"]
+                for ring in rings for a, b in zip(ring, ring[1:])
+            }
+            if any((b, a) in edges for a, b in edges):
+                problems.append(f"{name} {feature['id']}: an inner border survived the dissolve")
+            expected = _area(members[feature["id"]])
+            dissolved = _area(feature["geometry"]["coordinates"])
+            if abs(dissolved - expected) > DISSOLVE_AREA_TOLERANCE * abs(expected):
+                problems.append(f"{name} {feature['id']}: dissolved area {dissolved:.2f} != members' {expected:.2f}")
+    return problems
+
+
+if __name__ == "__main__":
+    # python -m utils.geo: validate the bundled geometry against data/countries.csv
+    countries = load_countries()
+    groups = {col: tuple(zip(countries["iso3"], countries[col].astype(str))) for col in ("region", "power_pool")}
+    missing = sorted(set(countries["iso3"]) - set(_source() or ()))
+    problems = check_geometry(groups)
+    if _source() is not None:
+        from utils.maps import animated_choropleth, check_animation
+
+        # A Year Playback-sized animation: one frame per year, every country
+        years = range(2000, 2026)
+        frames = pd.DataFrame(
+            [(year, iso3, i) for i, year in enumerate(years) for iso3 in countries["iso3"]],
+            columns=["year", "iso3", "Studies"],
+        )
+        problems += check_animation(
+            animated_choropleth(frames, locations="iso3", color="Studies", animation_frame="year")
+        )
+    print(f"{len(_source() or ())} countries with geometry; none for {', '.join(missing) or '-'}")
+    print("\n".join(problems) or "ok")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,189 @@
+"""Shared Africa choropleth built from one cached, pre-styled base figure."""
+
+import threading
+from collections import OrderedDict
+from functools import cache
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from utils.geo import DEFAULT_DETAIL, country_geometry, group_geometry, subset
+from utils.payload import reporting, slim
+
+# Styling every map on the platform shares
+GEO_STYLE = dict(
+    scope="africa", showframe=False, showcoastlines=True, coastlinecolor="#ccc",
+    showland=True, landcolor="#F0F4F0", showocean=True, oceancolor="#E3EEF9",
+    showcountries=True, countrycolor="#ccc",
+)
+# With bundled geometry the maps draw only our own polygons, so the browser
+# never fetches plotly's world basemap
+OFFLINE_GEO_STYLE = dict(visible=False, fitbounds="locations")
+
+# Serialised bytes an animation frame may add per location on top of the
+# first frame's full map, for :func:`check_animation`
+FRAME_BYTES_PER_LOCATION = 64
+
+# Finished figures kept per (layer, plotted values); shared by all sessions
+FIGURE_CACHE_SIZE = 64
+_figures: OrderedDict[tuple, go.Figure] = OrderedDict()
+_figures_lock = threading.Lock()
+
+
+def geo_style() -> dict:
+    return GEO_STYLE if country_geometry() is None else OFFLINE_GEO_STYLE
+
+
+def geometry_args(detail: str = DEFAULT_DETAIL) -> dict:
+    """Trace arguments that point a choropleth at the bundled geometry, when there is one."""
+    geometry = country_geometry(detail)
+    return {} if geometry is None else {"geojson": geometry, "featureidkey": "id"}
+
+
+def animated_choropleth(df: pd.DataFrame, detail: str = DEFAULT_DETAIL, **kwargs) -> go.Figure:
+    """
+    ``px.choropleth(df, animation_frame=..., **kwargs)`` pointed at the
+    bundled geometry. Plotly Express copies the geometry into every frame;
+    frames only restyle the first frame's traces, so it is kept there alone
+    and each frame ships just its values.
+    """
+    fig = px.choropleth(df, **kwargs, **geometry_args(detail))
+    for frame in fig.frames:
+        for trace in frame.data:
+            trace.update(geojson=None, featureidkey=None)
+    return fig
+
+
+def check_animation(fig: go.Figure) -> list[str]:
+    """
+    Problems with an animated map's payload: a frame carrying geometry, or
+    a figure larger than one map plus ``FRAME_BYTES_PER_LOCATION`` per
+    location and frame.
+    """
+    problems = [
+        f"frame {frame.name}: trace carries geometry" for frame in fig.frames
+        for trace in frame.data if trace.geojson is not None
+    ]
+    one_map = len(pio.to_json(go.Figure(data=fig.data, layout=fig.layout), validate=False))
+    values = sum(
+        0 if trace.locations is None else len(trace.locations) for frame in fig.frames for trace in frame.data
+    )
+    size = len(pio.to_json(fig, validate=False))
+    if size > one_map + values * FRAME_BYTES_PER_LOCATION:
+        problems.append(
+            f"{len(fig.frames)} frames take {size} bytes; one map is {one_map} "
+            f"and {values} frame values allow {values * FRAME_BYTES_PER_LOCATION} more"
+        )
+    return problems
+
+
+@cache
+def base_layout() -> go.Layout:
+    """The styled Africa geo layout, with the default template resolved, built once per process."""
+    return go.Figure(layout=dict(
+        geo=geo_style(), legend=dict(tracegroupgap=0), paper_bgcolor="rgba(0,0,0,0)",
+    )).layout
+
+
+def _hover(columns: list[str], labels: dict, first: str | None = None) -> str:
+    """px-style hover: bold country name, then ``label=value`` per column."""
+    lines = [first] if first else []
+    lines += [f"{labels.get(c, c)}=%{{customdata[{i}]}}" for i, c in enumerate(columns)]
+    return "<b>%{hovertext}</b><br><br>" + "<br>".join(lines) + "<extra></extra>"
+
+
+def _build(df, color, label, colorscale, color_map, hover, labels, title, height, top, colorbar, detail):
+    customdata = df[list(hover)].to_numpy(dtype=object) if hover else None
+    common = dict(locations=df["iso3"], hovertext=df["country_name"], customdata=customdata)
+    geometry = country_geometry(detail)
+    if color_map is None:
+        traces = [go.Choropleth(
+            z=df[color], coloraxis="coloraxis", name="",
+            hovertemplate=_hover(hover, labels, f"{label}=%{{z}}"),
+            **common, **geometry_args(detail),
+        )]
+    else:
+        # One single-colour trace per category, in order of appearance, so
+        # each category gets its own legend entry
+        traces = []
+        for category in pd.unique(df[color]):
+            rows = (df[color] == category).to_numpy()
+            colour = color_map.get(category, "#9E9E9E")
+            # Each trace carries only its own countries' polygons
+            shapes = {} if geometry is None else {
+                "geojson": subset(geometry, df["iso3"][rows]), "featureidkey": "id",
+            }
+            traces.append(go.Choropleth(
+                z=[1] * int(rows.sum()), colorscale=[[0, colour], [1, colour]],
+                showscale=False, showlegend=True, name=str(category), legendgroup=str(category),
+                hovertemplate=_hover(hover, labels, f"{label}={category}"),
+                **{k: (v[rows] if v is not None else None) for k, v in common.items()}, **shapes,
+            ))
+        groups = group_geometry(tuple(zip(df["iso3"], df[color].astype(str))), detail)
+        if groups is not None:
+            # Dissolved outline of each category on top of its member countries
+            traces.append(go.Choropleth(
+                geojson=groups, featureidkey="id", locations=[f["id"] for f in groups["features"]],
+                z=[0] * len(groups["features"]), colorscale=[[0, "rgba(0,0,0,0)"], [1, "rgba(0,0,0,0)"]],
+                showscale=False, showlegend=False, hoverinfo="skip",
+                marker_line=dict(color="#455A64", width=1.5),
+            ))
+    fig = go.Figure(data=traces, layout=base_layout())
+    fig.update_layout(
+        margin={"r": 0, "t": top, "l": 0, "b": 0}, height=height,
+        title=title, legend_title_text=label if color_map is not None else None,
+    )
+    if color_map is None:
+        fig.update_layout(coloraxis=dict(
+            colorscale=colorscale, colorbar={"title": {"text": label}, **(colorbar or {})},
+        ))
+    return fig
+
+
+def choropleth(
+    df: pd.DataFrame, color: str, label: str | None = None, *,
+    colorscale: list | None = None, color_map: dict | None = None,
+    hover: tuple = (), labels: dict | None = None, title: str | None = None,
+    height: int = 500, top: int = 10, colorbar: dict | None = None, detail: str = DEFAULT_DETAIL,
+) -> go.Figure:
+    """
+    Africa choropleth of ``df[color]`` by ``iso3``: continuous with
+    ``colorscale``, or one legend entry per category with ``color_map``.
+    ``hover`` lists extra columns for the tooltip. With bundled geometry,
+    ``detail`` picks its simplification level and categorical layers get a
+    dissolved outline per category.
+
+    Only the traces' values change from call to call; the styled layout
+    comes from :func:`base_layout`, and the finished figure is memoised on
+    the plotted values, so a repeat layer / filter state costs one hash.
+    The returned figure is shared and already slimmed: do not mutate it.
+    """
+    label = label or color
+    labels = labels or {}
+    hover = tuple(c for c in hover if c != color)
+    columns = ["iso3", "country_name", color, *hover]
+    values = pd.util.hash_pandas_object(df[columns], index=False).to_numpy().tobytes()
+    key = (
+        values, color, label, tuple(colorscale or ()), tuple((color_map or {}).items()),
+        hover, tuple(labels.items()), title, height, top, repr(colorbar), detail,
+    )
+    def build():
+        return _build(df, color, label, colorscale, color_map, hover, labels, title, height, top, colorbar, detail)
+
+    with _figures_lock:
+        fig = _figures.get(key)
+        if fig is not None:
+            _figures.move_to_end(key)
+    if fig is not None:
+        if reporting() and getattr(fig, "_payload_raw", None) is None:
+            # Cached before reporting was on: size an unslimmed rebuild for the report
+            fig._payload_raw = len(pio.to_json(build(), validate=False))
+        return fig
+    fig = slim(build(), measure=reporting())
+    with _figures_lock:
+        _figures[key] = fig
+        while len(_figures) > FIGURE_CACHE_SIZE:
+            _figures.popitem(last=False)
+    return fig
@@ -0,0 +1,83 @@
+"""Server-side sorting and pagination with cached, pre-formatted pages."""
+
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+# Formatted pages / sort orders kept across reruns and sessions
+PAGE_CACHE_SIZE = 256
+ORDER_CACHE_SIZE = 64
+
+
+class _LRU:
+    def __init__(self, size: int):
+        self.size = size
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build: Callable):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        value = build()
+        with self._lock:
+            self._items[key] = value
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+        return value
+
+
+_orders = _LRU(ORDER_CACHE_SIZE)
+_pages = _LRU(PAGE_CACHE_SIZE)
+
+
+def frame_key(df: pd.DataFrame, *parts) -> str:
+    """Short digest identifying ``df``'s rows (labels and order) plus any extra key ``parts``."""
+    h = hashlib.blake2b(df.index.to_numpy().tobytes(), digest_size=12)
+    h.update(repr(parts).encode())
+    return h.hexdigest()
+
+
+def sort_positions(df: pd.DataFrame, column: str | None, ascending: bool = True) -> np.ndarray:
+    """Row positions of ``df`` ordered by ``column`` (text case-insensitively, blanks last)."""
+    if column is None or column not in df.columns:
+        return np.arange(len(df))
+    values = df[column]
+    key = None
+    if not pd.api.types.is_numeric_dtype(values):
+        key = lambda s: s.astype(str).str.lower().replace("", np.nan)
+    order = pd.Series(values.to_numpy(), index=np.arange(len(df))).sort_values(
+        ascending=ascending, kind="stable", na_position="last", key=key,
+    )
+    return order.index.to_numpy()
+
+
+def n_pages(n_rows: int, page_size: int) -> int:
+    return max(math.ceil(n_rows / page_size), 1)
+
+
+def table_page(
+    df: pd.DataFrame, state: str, format_page: Callable[[pd.DataFrame], pd.DataFrame],
+    page: int, page_size: int, sort_by: str | None = None, ascending: bool = True,
+) -> pd.DataFrame:
+    """
+    Page ``page`` (1-based) of ``df`` sorted by ``sort_by``, run through
+    ``format_page``. Only the visible slice is ever formatted; the sort
+    order and each formatted page are cached per ``state`` (see
+    :func:`frame_key`), so paging back and forth or rerunning with the same
+    filters is a lookup. Returned pages are shared: do not modify them.
+    """
+    order = _orders.get_or_build(
+        (state, sort_by, ascending), lambda: sort_positions(df, sort_by, ascending)
+    )
+    page = min(max(page, 1), n_pages(len(order), page_size))
+    rows = order[(page - 1) * page_size: page * page_size]
+    return _pages.get_or_build(
+        (state, sort_by, ascending, page, page_size), lambda: format_page(df.iloc[rows])
+    )
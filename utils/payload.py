@@ -0,0 +1,195 @@
+"""Payload diet and per-page size report for the figures and tables a page ships."""
+
+import logging
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+log = logging.getLogger(__name__)
+
+# Trace attributes holding per-point numbers worth rounding
+_NUMERIC_ATTRS = ("x", "y", "z", "values", "lat", "lon", "customdata")
+
+
+@dataclass(frozen=True)
+class PayloadDiet:
+    """
+    What to strip from a figure or table before it is sent to the browser.
+
+    round_floats:    decimals kept on per-point floats (``None`` keeps all)
+    prune_template:  keep template trace defaults only for trace types in use
+    share_coloraxes: move identical inline colorscales into one layout colour axis
+    trim_hover:      drop ``customdata`` hover fields, keeping name and value
+    """
+    round_floats: int | None = 2
+    prune_template: bool = True
+    share_coloraxes: bool = True
+    trim_hover: bool = False
+
+    @classmethod
+    def from_env(cls) -> "PayloadDiet":
+        """
+        Read ``AISESA_PAYLOAD_DIET``: ``off``, or a comma list of ``round``,
+        ``prune``, ``share``, ``trim_hover``. Unset keeps the defaults.
+        """
+        spec = os.environ.get("AISESA_PAYLOAD_DIET")
+        if spec is None:
+            return cls()
+        options = {s.strip() for s in spec.split(",")}
+        return cls(
+            round_floats=cls.round_floats if "round" in options else None,
+            prune_template="prune" in options,
+            share_coloraxes="share" in options,
+            trim_hover="trim_hover" in options,
+        )
+
+
+DIET = PayloadDiet.from_env()
+
+
+def _round(value, decimals: int):
+    arr = np.asarray(value)
+    if arr.dtype.kind == "f":
+        return np.round(arr, decimals)
+    if arr.dtype == object:
+        return np.vectorize(
+            lambda v: round(v, decimals) if isinstance(v, float) else v, otypes=[object]
+        )(arr)
+    return value
+
+
+def _share_coloraxes(fig: go.Figure):
+    groups: dict[str, list] = {}
+    for trace in fig.data:
+        if "zmin" in trace and "coloraxis" in trace and trace.coloraxis is None and trace.colorscale is not None:
+            key = repr((trace.colorscale, trace.showscale, trace.zmin, trace.zmax))
+            groups.setdefault(key, []).append(trace)
+    n = sum(1 for k in fig.layout.to_plotly_json() if k.startswith("coloraxis"))
+    for traces in groups.values():
+        if len(traces) < 2:
+            continue
+        n += 1
+        name = "coloraxis" if n == 1 else f"coloraxis{n}"
+        first = traces[0]
+        fig.layout[name] = dict(
+            colorscale=first.colorscale, showscale=first.showscale is not False,
+            cmin=first.zmin, cmax=first.zmax,
+        )
+        for trace in traces:
+            trace.update(coloraxis=name, colorscale=None, showscale=None, zmin=None, zmax=None)
+
+
+def _trim_hover(trace):
+    if trace.customdata is None or not trace.hovertemplate:
+        return
+    head, sep, rest = trace.hovertemplate.partition("<extra>")
+    lines = [line for line in head.split("<br>") if "customdata" not in line]
+    trace.update(customdata=None, hovertemplate="<br>".join(lines) + sep + rest)
+
+
+def slim(fig: go.Figure, diet: PayloadDiet = DIET, measure: bool = False) -> go.Figure:
+    """
+    Apply ``diet`` to ``fig`` in place, once; returns ``fig``. With
+    ``measure`` the serialised size beforehand is kept for the report.
+    """
+    if getattr(fig, "_payload_diet", None) == diet:
+        return fig
+    fig._payload_raw = len(pio.to_json(fig, validate=False)) if measure else None
+    for trace in fig.data:
+        if diet.round_floats is not None:
+            for attr in _NUMERIC_ATTRS:
+                if attr in trace and trace[attr] is not None:
+                    trace[attr] = _round(trace[attr], diet.round_floats)
+        if diet.trim_hover:
+            _trim_hover(trace)
+    if diet.share_coloraxes:
+        _share_coloraxes(fig)
+    if diet.prune_template and fig.layout.template is not None:
+        template = fig.layout.template
+        used = {trace.type for trace in fig.data}
+        fig.layout.template = go.layout.Template(
+            layout=template.layout,
+            data={t: template.data[t] for t in used if t in template.data},
+        )
+    fig._payload_diet = diet
+    return fig
+
+
+def slim_table(df: pd.DataFrame, diet: PayloadDiet = DIET) -> pd.DataFrame:
+    if diet.round_floats is None:
+        return df
+    floats = df.select_dtypes("float").columns
+    return df.round({c: diet.round_floats for c in floats}) if len(floats) else df
+
+
+# ── Instrumentation ────────────────────────────────────────────────────────────
+
+def reporting() -> bool:
+    """Size recording is on with ``AISESA_PAYLOAD_REPORT=1`` or ``?payload=report``."""
+    return bool(os.environ.get("AISESA_PAYLOAD_REPORT")) or st.query_params.get("payload") == "report"
+
+
+def start_payload_report():
+    """
+    Start this page run's tally; call at the top of every page that ends
+    with :func:`payload_report`. Elements drawn by fragment reruns since
+    the last full run (which no report shows) are dropped here.
+    """
+    if reporting():
+        st.session_state["_payload_records"] = []
+    else:
+        st.session_state.pop("_payload_records", None)
+
+
+def _record(kind: str, label: str, raw: int, sent: int):
+    st.session_state.setdefault("_payload_records", []).append(
+        {"Element": label, "Kind": kind, "Bytes before diet": raw, "Bytes sent": sent}
+    )
+
+
+def _arrow_bytes(df: pd.DataFrame) -> int:
+    """Size of ``df`` as an Arrow IPC stream, the form tables are sent in."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+
+def plotly_chart(fig: go.Figure, label: str | None = None, **kwargs):
+    """``st.plotly_chart`` with the payload diet applied, recording sizes when reporting."""
+    measure = reporting()
+    slim(fig, measure=measure)
+    if measure:
+        sent = len(pio.to_json(fig, validate=False))
+        _record("figure", label or fig.layout.title.text or "figure", fig._payload_raw or sent, sent)
+    return st.plotly_chart(fig, **kwargs)
+
+
+def dataframe(df: pd.DataFrame, label: str | None = None, **kwargs):
+    """``st.dataframe`` with the payload diet applied, recording sizes when reporting."""
+    slimmed = slim_table(df)
+    if reporting():
+        _record(
+            "table", label or f"{len(df)} × {len(df.columns)} table", _arrow_bytes(df), _arrow_bytes(slimmed),
+        )
+    return st.dataframe(slimmed, **kwargs)
+
+
+def payload_report(page: str):
+    """Show (and log) what this render of ``page`` shipped, then start a fresh tally."""
+    records = st.session_state.pop("_payload_records", [])
+    if not reporting() or not records:
+        return
+    report = pd.DataFrame(records)
+    total, raw = int(report["Bytes sent"].sum()), int(report["Bytes before diet"].sum())
+    log.info("%s payload: %d bytes in %d elements (%d before diet)", page, total, len(report), raw)
+    with st.expander(f"Payload report · {total / 1024:.1f} KB sent ({raw / 1024:.1f} KB before diet)"):
+        st.dataframe(report, use_container_width=True, hide_index=True)
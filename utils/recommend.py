@@ -0,0 +1,243 @@
+"""Recommender scoring rules and the precomputed recommendation lookup table."""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Questionnaire: question → its answer options. An answer is coded as its
+# position + 1, with 0 for "unanswered"
+QUESTIONS = {
+    "policy": [
+        "National energy planning (supply mix, capacity expansion)",
+        "Electrification / energy access (off-grid, mini-grid)",
+        "Regional power trade (interconnections, power pools)",
+        "Short-term dispatch and grid flexibility",
+        "Climate-energy-water-land nexus",
+        "Demand forecasting",
+        "Environmental / climate impact assessment",
+    ],
+    "scale": ["National", "Sub-national / state / province", "Regional / multi-country", "Continental"],
+    "budget": ["Zero budget (open source only)", "Low / freemium acceptable", "Any budget"],
+    "capacity": [
+        "Limited (no programming, GUI-only)",
+        "Intermediate (scripting, some technical skills)",
+        "Advanced (Python, Julia, full programming)",
+    ],
+    "horizon": [
+        "Long-term (2030–2060, strategic planning)",
+        "Medium-term (5–15 years)",
+        "Short-term / sub-annual dispatch",
+    ],
+    "data": [
+        "Good — detailed national statistics available",
+        "Moderate — some gaps, proxy data needed",
+        "Limited — data-scarce, low-income context",
+    ],
+}
+
+
+# Country context → questionnaire answers, for the batch recommendations.
+# Electrification tiers (upper bounds, %) decide objective and scale: low access
+# is an energy-access problem, mid access national planning, and high-access
+# grids inside a power pool look at regional trade
+ACCESS_TIERS = (50, 80)
+TIER_ANSWERS = [
+    {"policy": QUESTIONS["policy"][1], "scale": QUESTIONS["scale"][1]},
+    {"policy": QUESTIONS["policy"][0], "scale": QUESTIONS["scale"][0]},
+    {"policy": QUESTIONS["policy"][2], "scale": QUESTIONS["scale"][2]},
+]
+CAPACITY_ANSWERS = dict(zip(("no", "partial", "yes"), QUESTIONS["capacity"]))
+DATA_ANSWERS = dict(zip(("good", "moderate", "poor"), QUESTIONS["data"]))
+# Open source only where there is no institutional capacity or data is poor
+BUDGET_ANSWERS = (QUESTIONS["budget"][1], QUESTIONS["budget"][0])
+HORIZON_ANSWER = QUESTIONS["horizon"][0]
+
+
+class Rule(NamedTuple):
+    """
+    ``points`` for every tool whose ``feature`` (a column of
+    :func:`tool_features`) takes one of ``values``, when the answer to
+    ``question`` contains ``answer``. Rules without a question always apply.
+    """
+    question: str | None
+    answer: str | None
+    feature: str
+    values: tuple
+    points: int
+
+
+RULES = [
+    # Policy objective ↔ what the tool is best for
+    Rule("policy", "National energy planning", "best_for", ("national_planning",), 30),
+    Rule("policy", "Electrification", "best_for", ("electrification",), 30),
+    Rule("policy", "Regional power trade", "best_for", ("regional_trade",), 30),
+    Rule("policy", "dispatch", "best_for", ("dispatch_flexibility",), 30),
+    Rule("policy", "nexus", "best_for", ("nexus_modeling",), 30),
+    Rule("policy", "Demand", "best_for", ("demand_forecasting",), 30),
+    Rule("policy", "Environmental", "best_for", ("environmental_impact",), 30),
+    # Budget ↔ license
+    Rule("budget", "Zero budget", "license", ("open_source",), 15),
+    Rule("budget", "Zero budget", "license", ("proprietary",), -25),
+    Rule("budget", "Low", "license", ("open_source", "freemium"), 10),
+    Rule("budget", "Low", "license", ("proprietary",), -10),
+    # Team capacity ↔ programming required
+    Rule("capacity", "Limited", "programming", ("none",), 15),
+    Rule("capacity", "Limited", "programming", ("advanced",), -20),
+    Rule("capacity", "Intermediate", "programming", ("none", "intermediate"), 8),
+    Rule("capacity", "Advanced", "programming", ("advanced",), 10),
+    # Time horizon ↔ horizon class
+    Rule("horizon", "Long-term", "horizon", ("long",), 10),
+    Rule("horizon", "Short-term", "horizon", ("short",), 10),
+    # Scale ↔ what the tool is best for
+    Rule("scale", "Sub-national", "best_for", ("electrification",), 8),
+    Rule("scale", "Regional", "best_for", ("regional_trade",), 8),
+    # Data-scarce contexts favour gentler learning curves
+    Rule("data", "Limited", "learning_curve", ("low", "medium"), 5),
+    # Whatever the answers
+    Rule(None, None, "training", ("yes",), 5),
+    Rule(None, None, "studies_tier", ("10+",), 10),
+    Rule(None, None, "studies_tier", ("5+",), 5),
+]
+
+# Horizon class of a tool, from its name
+LONG_HORIZON_TOOLS = ["OSeMOSYS", "TIMES", "MESSAGE", "LEAP", "TEMBA", "CLEWs", "Balmorel"]
+SHORT_HORIZON_TOOLS = ["FlexTool", "PLEXOS", "Dispa-SET", "SWITCH", "EnergyPLAN"]
+
+
+def tool_features(tools: pd.DataFrame) -> pd.DataFrame:
+    """The per-tool columns that :data:`RULES` test, parsed once from tools.csv."""
+    name = tools["tool_name"].astype(str)
+    studies = tools["nb_studies_in_inventory"].astype(int)
+    return pd.DataFrame({
+        "best_for": tools["best_for"].astype(str).str.split(",").map(
+            lambda tags: frozenset(t.strip() for t in tags if t.strip())
+        ),
+        "license": tools["license"].astype(str),
+        "programming": tools["programming_required"].astype(str),
+        "learning_curve": tools["learning_curve"].astype(str),
+        "horizon": np.select(
+            [name.map(lambda n: any(t in n for t in LONG_HORIZON_TOOLS)).to_numpy(dtype=bool),
+             name.map(lambda n: any(t in n for t in SHORT_HORIZON_TOOLS)).to_numpy(dtype=bool)],
+            ["long", "short"], "",
+        ),
+        "training": tools["training_available"].astype(str),
+        "studies_tier": np.select([studies >= 10, studies >= 5], ["10+", "5+"], ""),
+    }, index=tools.index)
+
+
+def rule_points(features: pd.DataFrame, rules=RULES) -> np.ndarray:
+    """(n rules × n tools) points each rule gives each tool once it applies."""
+    points = np.zeros((len(rules), len(features)), dtype=np.int16)
+    for i, rule in enumerate(rules):
+        column = features[rule.feature]
+        if rule.feature == "best_for":
+            hit = column.map(lambda tags: not tags.isdisjoint(rule.values))
+        else:
+            hit = column.isin(rule.values)
+        points[i] = hit.to_numpy(dtype=bool) * rule.points
+    return points
+
+
+def answer_code(question: str, answer: str | None) -> int:
+    """Position of ``answer`` among the question's options + 1, or 0 if unanswered."""
+    return 0 if answer is None else QUESTIONS[question].index(answer) + 1
+
+
+class RecommendationTable:
+    """
+    Every tool's score, and the resulting ranking, for every combination of
+    questionnaire answers (unanswered included), built once per tools.csv
+    version.
+
+    :data:`RULES` compile against the tools' features into one points row
+    per rule. Each rule reads a single answer, so a score is the always-on
+    rules plus one term per question; the table is those terms
+    broadcast-added over the whole answer space, and a recommendation is a
+    single index into it.
+    """
+
+    def __init__(self, tools: pd.DataFrame, rules=RULES):
+        self.tools = tools.index
+        self.names = tools["tool_name"].to_numpy()
+        self.features = tool_features(tools)
+        points = rule_points(self.features, rules)
+
+        table = sum((p for r, p in zip(rules, points) if r.question is None), np.zeros(len(tools), np.int16))
+        for axis, (question, options) in enumerate(QUESTIONS.items()):
+            # Row 0 (unanswered) adds nothing; row i the points of every rule
+            # that fires on option i
+            terms = np.zeros((len(options) + 1, len(tools)), dtype=np.int16)
+            for rule, p in zip(rules, points):
+                if rule.question == question:
+                    for i, option in enumerate(options, start=1):
+                        if rule.answer in option:
+                            terms[i] += p
+            shape = [1] * len(QUESTIONS) + [len(tools)]
+            shape[axis] = len(options) + 1
+            table = table + terms.reshape(shape)
+        self.scores = table
+        # Best first; ties keep inventory order
+        self.order = np.argsort(-table, axis=-1, kind="stable").astype(np.int16)
+
+    def _cell(self, answers: dict) -> tuple:
+        return tuple(answer_code(q, answers.get(q)) for q in QUESTIONS)
+
+    def ranked(self, **answers) -> pd.Series:
+        """Match score of every tool for ``answers`` (question → option), best first."""
+        cell = self._cell(answers)
+        order = self.order[cell]
+        return pd.Series(self.scores[cell][order], index=self.tools[order], name="match_score")
+
+    def score_matrix(self, answers: pd.DataFrame) -> np.ndarray:
+        """
+        Scores of every tool for every row of ``answers`` (one column per
+        question, ``None`` for unanswered): an (n rows × n tools) array from
+        a single fancy index into the table.
+        """
+        codes = [
+            answers[q].map({o: i for i, o in enumerate(options, start=1)}).fillna(0).to_numpy(dtype=np.intp)
+            for q, options in QUESTIONS.items()
+        ]
+        return self.scores[tuple(codes)]
+
+    def top_share(self, k: int = 3) -> pd.Series:
+        """Share of all answer combinations that rank each tool in the top ``k``."""
+        top = self.order[..., :k].reshape(-1)
+        counts = np.bincount(top, minlength=len(self.tools))
+        return pd.Series(counts / (top.size / k), index=self.tools, name="top_share")
+
+
+def country_profiles(countries: pd.DataFrame) -> pd.DataFrame:
+    """Questionnaire answers standing in for each country's context, indexed by ISO2 code."""
+    rate = countries["electrification_rate"].to_numpy(dtype=float)
+    pooled = countries["power_pool"].astype(str).str.strip().ne("").to_numpy()
+    tier = np.where(rate < ACCESS_TIERS[0], 0, np.where((rate >= ACCESS_TIERS[1]) & pooled, 2, 1))
+    capacity = countries["has_institutional_capacity"].astype(str)
+    data = countries["data_availability"].astype(str)
+    constrained = (capacity.eq("no") | data.eq("poor")).to_numpy()
+    return pd.DataFrame({
+        "policy": [TIER_ANSWERS[t]["policy"] for t in tier],
+        "scale": [TIER_ANSWERS[t]["scale"] for t in tier],
+        "budget": np.where(constrained, BUDGET_ANSWERS[1], BUDGET_ANSWERS[0]),
+        "capacity": capacity.map(CAPACITY_ANSWERS).to_numpy(),
+        "horizon": HORIZON_ANSWER,
+        "data": data.map(DATA_ANSWERS).to_numpy(),
+    }, index=pd.Index(countries["iso_code"], name="iso_code"))
+
+
+def recommend_countries(countries: pd.DataFrame, table: RecommendationTable) -> pd.DataFrame:
+    """
+    Every country's profile, scored against every tool at once: the best
+    tool, its score and the runner-up, indexed by ISO2 code.
+    """
+    profiles = country_profiles(countries)
+    scores = table.score_matrix(profiles)
+    # Best first; ties keep inventory order, as in the interactive ranking
+    order = np.argsort(-scores, axis=1, kind="stable")
+    best = order[:, 0]
+    return profiles.assign(
+        recommended_tool=table.names[best],
+        recommendation_score=scores[np.arange(len(scores)), best],
+        runner_up=table.names[order[:, 1]] if scores.shape[1] > 1 else None,
+    )
@@ -0,0 +1,138 @@
+"""Columnar gap and readiness scoring with configurable weights."""
+
+from dataclasses import dataclass, fields, replace
+
+import numpy as np
+import pandas as pd
+
+# Ordinal levels as a fraction of the full score for that component
+CAPACITY_LEVELS = {"yes": 1.0, "partial": 0.5, "no": 0.0}
+DATA_LEVELS = {"good": 1.0, "moderate": 0.5, "poor": 0.0}
+
+
+@dataclass(frozen=True)
+class GapWeights:
+    """Points each component contributes to the gap score (default total 100)."""
+    features: float = 40
+    capacity: float = 30
+    data: float = 20
+    density: float = 10
+    density_cap: int = 10  # studies at which model density stops counting
+
+    @property
+    def total(self) -> float:
+        return self.features + self.capacity + self.data + self.density
+
+    def scaled(self, total: float = 100) -> "GapWeights":
+        """Same proportions, rescaled so the components sum to ``total``."""
+        return _scaled(self, total, ("features", "capacity", "data", "density"))
+
+
+@dataclass(frozen=True)
+class ReadinessWeights:
+    """Points each component contributes to the readiness score (default total 10)."""
+    capacity: float = 3
+    data: float = 3
+    ndc: float = 1
+    lts: float = 1
+    electrification: float = 2
+
+    @property
+    def total(self) -> float:
+        return sum(getattr(self, f.name) for f in fields(self))
+
+    def scaled(self, total: float = 10) -> "ReadinessWeights":
+        """Same proportions, rescaled so the components sum to ``total``."""
+        return _scaled(self, total, tuple(f.name for f in fields(self)))
+
+
+GAP_WEIGHTS = GapWeights()
+READINESS_WEIGHTS = ReadinessWeights()
+
+
+def _scaled(weights, total, names):
+    current = sum(getattr(weights, n) for n in names)
+    if current == 0 or current == total:
+        return weights
+    factor = total / current
+    return replace(weights, **{n: getattr(weights, n) * factor for n in names})
+
+
+def _levels(values, levels: dict) -> np.ndarray:
+    """Map ordinal strings to their level fraction; unknown values score 0."""
+    return pd.Series(values).astype(str).map(levels).fillna(0).to_numpy(dtype=float)
+
+
+def _flags(values) -> np.ndarray:
+    """Boolean flags (missing counts as 0), or ``"yes"`` / ``"no"`` strings, as 1 / 0."""
+    values = pd.Series(values)
+    if pd.api.types.is_bool_dtype(values):
+        return values.to_numpy(dtype=int, na_value=0)
+    return values.astype(str).eq("yes").to_numpy(dtype=int)
+
+
+def _round1(values: np.ndarray) -> np.ndarray:
+    """Vectorised ``round(v, 1)`` that agrees with Python's correctly-rounded result."""
+    out = np.round(values, 1)
+    # v * 10 can land exactly on .5 through float error; defer those to round()
+    scaled = values * 10
+    tie = scaled - np.floor(scaled) == 0.5
+    out[tie] = [round(v, 1) for v in values[tie].tolist()]
+    return out
+
+
+def gap_scores(
+    feature_ratio, capacity, data_availability, nb_models, weights: GapWeights = GAP_WEIGHTS
+) -> np.ndarray:
+    """
+    Gap scores for whole columns, higher = more under-served.
+    Components (default weights):
+      - African feature coverage (40)
+      - Institutional capacity (30)
+      - Data availability (20)
+      - Model density (10)
+    """
+    feat = np.asarray(feature_ratio, dtype=float)
+    cap = _levels(capacity, CAPACITY_LEVELS)
+    dat = _levels(data_availability, DATA_LEVELS)
+    n = np.minimum(np.asarray(nb_models, dtype=float), weights.density_cap)
+    raw = (
+        (1 - feat) * weights.features
+        + (1 - cap) * weights.capacity
+        + (1 - dat) * weights.data
+        + (1 - n / weights.density_cap) * weights.density
+    )
+    return np.round(raw).astype(int)
+
+
+def readiness_scores(
+    capacity, data_availability, has_ndc, has_lts, electrification_rate,
+    weights: ReadinessWeights = READINESS_WEIGHTS,
+) -> np.ndarray:
+    """Readiness scores for whole columns, rounded to one decimal."""
+    cap_pts = _levels(capacity, CAPACITY_LEVELS) * weights.capacity
+    dat_pts = _levels(data_availability, DATA_LEVELS) * weights.data
+    ndc_pt = _flags(has_ndc) * weights.ndc
+    lts_pt = _flags(has_lts) * weights.lts
+    elec = np.asarray(electrification_rate, dtype=float)
+    elec_pts = np.minimum(elec / 100 * weights.electrification, weights.electrification)
+    return _round1(cap_pts + dat_pts + ndc_pt + lts_pt + elec_pts)
+
+
+def score_countries(
+    countries: pd.DataFrame,
+    gap_weights: GapWeights = GAP_WEIGHTS,
+    readiness_weights: ReadinessWeights = READINESS_WEIGHTS,
+) -> pd.DataFrame:
+    """Return a view of an enriched countries frame with both scores recomputed."""
+    return countries.assign(
+        gap_score=gap_scores(
+            countries["feature_ratio"], countries["has_institutional_capacity"],
+            countries["data_availability"], countries["nb_models_applied"], gap_weights,
+        ),
+        readiness_score=readiness_scores(
+            countries["has_institutional_capacity"], countries["data_availability"],
+            countries["has_ndc"], countries["has_lts"], countries["electrification_rate"],
+            readiness_weights,
+        ),
+    )
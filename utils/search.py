@@ -0,0 +1,114 @@
+"""Inverted full-text index for ranked study search."""
+
+import math
+import re
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Text fields searched, with the weight a hit in each field contributes
+SEARCH_FIELDS = {
+    "model_name": 3.0,
+    "authors": 2.0,
+    "study_objective": 1.0,
+    "institutional_users": 1.0,
+    "sector": 1.0,
+    "developer_origin": 1.0,
+}
+
+# How much a term counts when it only matches the start / inside of a token
+PREFIX_WEIGHT = 0.7
+INFIX_WEIGHT = 0.4
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def _trigrams(token: str) -> set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class SearchIndex:
+    """
+    Token → postings index over the study text fields, built once per
+    studies version. Each query term matches tokens exactly, by prefix, or
+    (for terms of 3+ characters) as a substring found through a trigram
+    index. All terms must match, and rows are ranked by field-weighted
+    TF-IDF.
+    """
+
+    def __init__(self, df: pd.DataFrame, fields: dict = SEARCH_FIELDS):
+        self.index = df.index
+        self.n = len(df)
+        parts = []
+        for field, weight in fields.items():
+            if field not in df.columns:
+                continue
+            tokens = df[field].astype(str).str.lower().str.findall(TOKEN_RE)
+            tokens = pd.Series(tokens.to_numpy(), index=np.arange(self.n)).explode().dropna()
+            parts.append(pd.DataFrame({"token": tokens.to_numpy(), "row": tokens.index, "weight": weight}))
+        postings = (
+            pd.concat(parts).groupby(["token", "row"])["weight"].sum()
+            if parts else pd.Series(dtype=float)
+        )
+
+        self.vocab: list[str] = []
+        self._rows: list[np.ndarray] = []
+        self._scores: list[np.ndarray] = []
+        for token, group in postings.groupby(level="token", sort=True):
+            idf = math.log(1 + self.n / len(group))
+            self.vocab.append(token)
+            self._rows.append(group.index.get_level_values("row").to_numpy())
+            self._scores.append(group.to_numpy() * idf)
+        self._ids = {token: i for i, token in enumerate(self.vocab)}
+        self._by_trigram: dict[str, set[int]] = {}
+        for i, token in enumerate(self.vocab):
+            for gram in _trigrams(token):
+                self._by_trigram.setdefault(gram, set()).add(i)
+
+    def _matches(self, term: str) -> list[tuple[int, float]]:
+        """Vocabulary ids matching ``term``, each with its match-type weight."""
+        found = {}
+        start = bisect_left(self.vocab, term)
+        for i in range(start, len(self.vocab)):
+            if not self.vocab[i].startswith(term):
+                break
+            found[i] = PREFIX_WEIGHT
+        if len(term) >= 3:
+            grams = iter(_trigrams(term))
+            candidates = set(self._by_trigram.get(next(grams), ()))
+            for gram in grams:
+                candidates &= self._by_trigram.get(gram, set())
+            for i in candidates:
+                if i not in found and term in self.vocab[i]:
+                    found[i] = INFIX_WEIGHT
+        exact = self._ids.get(term)
+        if exact is not None:
+            found[exact] = 1.0
+        return list(found.items())
+
+    def search(self, query: str) -> pd.Series:
+        """
+        Relevance scores of the studies matching every term of ``query``,
+        indexed by the studies' index labels and sorted best first.
+        """
+        terms = dict.fromkeys(tokenize(query))
+        if not terms:
+            return pd.Series(dtype=float, index=self.index[:0])
+        total = np.zeros(self.n)
+        matched = np.ones(self.n, dtype=bool)
+        for term in terms:
+            best = np.zeros(self.n)
+            for i, weight in self._matches(term):
+                rows = self._rows[i]
+                best[rows] = np.maximum(best[rows], self._scores[i] * weight)
+            matched &= best > 0
+            total += best
+        rows = np.flatnonzero(matched)
+        # Stable sort keeps inventory order among equal scores
+        rows = rows[np.argsort(-total[rows], kind="stable")]
+        return pd.Series(total[rows], index=self.index[rows])
@@ -0,0 +1,294 @@
+"""Process-wide dataset store shared by every page."""
+
+import functools
+import inspect
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable
+
+import pandas as pd
+import streamlit as st
+
+from utils.data import (
+    STUDY_FILTER_COLUMNS, load_countries, load_studies, load_study_text, load_tools, load_power_pools,
+    build_country_index, build_pool_index, enrich_countries, data_versions, study_columns,
+    with_study_text,
+)
+from utils.cube import YearCube
+from utils.filters import BitmapIndex
+from utils.recommend import RecommendationTable, recommend_countries
+from utils.search import SearchIndex
+
+log = logging.getLogger(__name__)
+
+# Seconds between checks of data/ for edited source files
+REFRESH_INTERVAL = 5
+
+# Copy-on-write turns every slice / assign of the shared frames into a lazy
+# view, so sessions never duplicate column data they only read. It is the
+# only behaviour in pandas 3; on pandas 2 importing this module switches it on
+# for the whole process (every page imports it), which is intended: pages rely
+# on derived frames never writing through to the shared ones
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+_READ_ONLY_MESSAGE = "Shared datasets are read-only; derive a view instead, e.g. df.assign(col=...)"
+
+
+class _ReadOnlyIndexer:
+    """``.loc`` / ``.iloc`` / ``.at`` / ``.iat`` of a :class:`FrozenFrame`: lookups only."""
+
+    def __init__(self, indexer):
+        self._indexer = indexer
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    def __setitem__(self, key, value):
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+    def __call__(self, *args, **kwargs):
+        return _ReadOnlyIndexer(self._indexer(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._indexer, name)
+
+
+class FrozenFrame(pd.DataFrame):
+    """
+    Read-only view of a shared frame. Every in-place write raises: column
+    and cell assignment (``[]``, ``.loc``, ``.iloc``, ``.at``, ``.iat``),
+    ``inplace=True`` methods and replacing ``columns`` / ``index``. Anything
+    derived from it (slices, ``assign``, ``rename``...) is a plain
+    DataFrame, so per-view columns live in the page's own overlay.
+    """
+
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+    __setitem__ = __delitem__ = insert = pop = isetitem = _readonly
+    # Where inplace=True methods and the columns / index setters write
+    _update_inplace = _set_axis = _readonly
+
+    @property
+    def loc(self):
+        return _ReadOnlyIndexer(super().loc)
+
+    @property
+    def iloc(self):
+        return _ReadOnlyIndexer(super().iloc)
+
+    @property
+    def at(self):
+        return _ReadOnlyIndexer(super().at)
+
+    @property
+    def iat(self):
+        return _ReadOnlyIndexer(super().iat)
+
+
+def _no_inplace(method):
+    @functools.wraps(method)
+    def guarded(self, *args, **kwargs):
+        if kwargs.get("inplace"):
+            raise TypeError(_READ_ONLY_MESSAGE)
+        return method(self, *args, **kwargs)
+    return guarded
+
+
+# Some inplace=True methods (fillna, replace...) write into the column arrays
+# before reaching _update_inplace, so refuse them up front
+for _name, _method in inspect.getmembers(pd.DataFrame, inspect.isfunction):
+    if "inplace" in inspect.signature(_method).parameters:
+        setattr(FrozenFrame, _name, _no_inplace(_method))
+
+
+def freeze(df: pd.DataFrame) -> FrozenFrame:
+    """Wrap ``df`` as a read-only view without copying its data."""
+    return df if isinstance(df, FrozenFrame) else FrozenFrame(df)
+
+
+class Lazy:
+    """A value built by ``build`` on first :meth:`get`, once per process, then shared."""
+
+    def __init__(self, build: Callable):
+        self._build = build
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._build is not None:
+            with self._lock:
+                if self._build is not None:
+                    self._value = self._build()
+                    self._build = None
+        return self._value
+
+
+@dataclass(frozen=True)
+class Datasets:
+    """Every loaded and derived dataset, built together from one data version."""
+    countries: pd.DataFrame      # enriched with gap / readiness scores
+    studies: pd.DataFrame        # every column but the STUDY_TEXT_COLUMNS
+    country_index: pd.DataFrame  # study × country incidence
+    study_filters: BitmapIndex   # per (column, value) bitmaps over studies
+    study_columns: list[str]     # studies.csv's column order, text columns included
+    lazy_study_text: Lazy        # the STUDY_TEXT_COLUMNS by study id, read on first use
+    lazy_study_search: Lazy      # inverted full-text index, built on the first search
+    map_cube: YearCube           # cumulative counts by year × scale × approach × country / pool
+    tools: pd.DataFrame
+    recommendations: RecommendationTable  # ranked tool scores for every questionnaire answer set
+    country_recommendations: pd.DataFrame  # per-country profile, best tool and runner-up
+    power_pools: pd.DataFrame
+    versions: dict = field(default_factory=dict)  # source file → content hash
+
+    @property
+    def study_text(self) -> pd.DataFrame:
+        return self.lazy_study_text.get()
+
+    @property
+    def study_search(self) -> SearchIndex:
+        return self.lazy_study_search.get()
+
+
+def build_datasets(versions: dict | None = None, previous: Datasets | None = None) -> Datasets:
+    """
+    Load, parse and enrich every dataset from ``data/``. Anything in
+    ``previous`` whose source files still have the same content hash is
+    reused rather than rebuilt.
+    """
+    versions = versions or data_versions()
+
+    def unchanged(*sources):
+        return previous is not None and all(previous.versions.get(f) == versions[f] for f in sources)
+
+    if unchanged("studies.csv"):
+        studies, country_index = previous.studies, previous.country_index
+        study_filters, map_cube = previous.study_filters, previous.map_cube
+        columns = previous.study_columns
+        study_text, study_search = previous.lazy_study_text, previous.lazy_study_search
+    else:
+        studies = freeze(load_studies())
+        columns = study_columns(versions["studies.csv"])
+        country_index = freeze(build_country_index(studies))
+        study_filters = BitmapIndex(studies, STUDY_FILTER_COLUMNS)
+        # The text of this snapshot's version of studies.csv, from its cache
+        # even if the file has been edited since; joined on id either way
+        version = versions["studies.csv"]
+        study_text = Lazy(lambda: freeze(load_study_text(version)))
+        study_search = Lazy(lambda: SearchIndex(with_study_text(studies, study_text.get(), columns)))
+        map_cube = YearCube(studies, {"country": country_index, "pool": build_pool_index(studies)})
+    if unchanged("countries.csv", "studies.csv"):
+        countries = previous.countries
+    else:
+        countries = freeze(enrich_countries(load_countries(), studies, country_index))
+    if unchanged("tools.csv"):
+        tools, recommendations = previous.tools, previous.recommendations
+    else:
+        tools = freeze(load_tools())
+        recommendations = RecommendationTable(tools)
+    if unchanged("countries.csv", "tools.csv"):
+        country_recommendations = previous.country_recommendations
+    else:
+        country_recommendations = freeze(recommend_countries(countries, recommendations))
+    return Datasets(
+        countries=countries,
+        studies=studies,
+        country_index=country_index,
+        study_filters=study_filters,
+        study_columns=columns,
+        lazy_study_text=study_text,
+        lazy_study_search=study_search,
+        map_cube=map_cube,
+        tools=tools,
+        recommendations=recommendations,
+        country_recommendations=country_recommendations,
+        power_pools=previous.power_pools if unchanged("power_pools.csv") else freeze(load_power_pools()),
+        versions=versions,
+    )
+
+
+class DatasetStore:
+    """
+    Process-wide holder of the current :class:`Datasets`.
+
+    Only the very first load happens on a request. After that a background
+    thread polls the source files' content versions and, when one changes,
+    rebuilds off the request path and swaps the new snapshot in with a single
+    reference assignment. A page that grabbed a snapshot keeps using it until
+    its next rerun.
+    """
+
+    def __init__(self, poll_interval: float = REFRESH_INTERVAL):
+        self.poll_interval = poll_interval
+        self._data: Datasets | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: threading.Thread | None = None
+
+    def get(self) -> Datasets:
+        data = self._data
+        if data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = build_datasets()
+                data = self._data
+        if not self._stop.is_set():
+            # Also revives a watcher that died, so refreshes never stop for good
+            self.start()
+        return data
+
+    def refresh(self) -> bool:
+        """Rebuild if any source file changed; return whether a new snapshot was swapped in."""
+        versions = data_versions()
+        current = self._data
+        if current is not None and current.versions == versions:
+            return False
+        with self._lock:
+            self._data = build_datasets(versions, self._data)
+        return True
+
+    def start(self):
+        if self._watcher is None or not self._watcher.is_alive():
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, name="dataset-refresher", daemon=True)
+            self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        failed = None
+        while not self._stop.wait(self.poll_interval):
+            try:
+                # A source file can be briefly missing (an editor's rename on
+                # save, a git checkout): wait for the next poll
+                versions = data_versions()
+            except OSError:
+                continue
+            if versions == failed:
+                continue
+            try:
+                self.refresh()
+                failed = None
+            except Exception:
+                # e.g. an editor's half-written CSV: keep serving the last good
+                # snapshot and retry once the files change again
+                failed = versions
+                log.exception("Dataset refresh failed; keeping the previous version")
+
+
+# One store, and so one in-memory copy of every frame, for the whole process:
+# sessions share the same frozen objects with no per-call pickling
+@st.cache_resource(show_spinner=False)
+def _store() -> DatasetStore:
+    return DatasetStore()
+
+
+def get_datasets() -> Datasets:
+    return _store().get()
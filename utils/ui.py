@@ -1,5 +1,9 @@
 """Shared UI components: sidebar CSS, theming, common widgets."""
 
+import streamlit as st
+
+from utils.export import EXPORT_FORMATS, available_formats, export_rows
+
 # Sidebar colour: dark slate-teal — readable, less visually heavy than pure dark green
 SIDEBAR_CSS = """
 <style>
@@ -55,3 +59,23 @@ SIDEBAR_CSS = """
   .block-container { padding-top: 2.5rem !important; }
 </style>
 """
+
+
+def export_controls(df, rows, name: str, key: str, text=None, columns=None):
+    """
+    Format picker and download button for the rows of ``df`` labelled
+    ``rows``, with every column or just ``columns`` (see
+    :func:`utils.export.export_rows`). The file is only built when the
+    button is clicked, off the page script's thread; ``text`` may be a
+    callable returning the frame, so columns loaded on demand are only
+    read then.
+    """
+    rows = getattr(rows, "to_numpy", lambda: rows)()
+    c1, c2 = st.columns([1, 3])
+    fmt = c1.selectbox("Export format", available_formats(), key=f"{key}_fmt", label_visibility="collapsed")
+    ext, mime, _ = EXPORT_FORMATS[fmt]
+    c2.download_button(
+        f"Download {len(rows)} studies ({fmt}, all columns)",
+        data=lambda: export_rows(df, rows, fmt, text=text() if callable(text) else text, columns=columns),
+        file_name=f"{name}.{ext}", mime=mime, key=f"{key}_dl", on_click="ignore",
+    )